@@ -0,0 +1,718 @@
+"""
+This file contains an array backed version of the Heap class. Instead of linking
+PathNodes together with left, right, parent and generation_right pointers, the
+complete binary tree is kept implicitly in a flat list where the node at index i
+has its children at 2 * i and 2 * i + 1 (the same indexing temp_path already
+uses). Swaps are plain element exchanges in the list, so no pointers have to be
+rewired. The go method, is_heap and the .dot output work the same as the pointer
+tree version.
+
+The array heap can also have more than 2 children per node. A d ary heap keeps
+the children of index i at d * (i - 1) + 2 up to d * i + 1, so it is about
+log(d) times shallower, which makes sift_up and pop cheaper on large heaps.
+
+The array heap can also be kept as a live min heap with push, pop, peek,
+pushpop, replace, decrease_key and remove, each O(log n). The nodes returned
+by push are handles that decrease_key and remove take, every node knows its
+index in the list so handles never have to be searched for.
+"""
+
+# import Heap for the shared reading, printing and go logic
+from Heap import Heap
+from PathNode import PathNode
+import heapq
+import Snapshot
+
+class ArrayHeap(Heap):
+    """
+    ArrayHeap class keeps the complete binary tree in the nodes list (1 based,
+    index 0 is unused) and does all of its tree walking with index arithmetic.
+    The root of the tree is the index 1, so every method that takes a root
+    takes an index instead of a PathNode.
+    """
+
+    # index arithmetic works for any number of children
+    ARITIES = None
+
+    def __init__(self, input_file, label, debug=False, echo=True, workers=1, stats=None,
+                 priority=None, arity=2, trie=False):
+        """
+        Creates an array heap object, same as Heap but with an empty nodes list.
+
+        args:
+            input_file (str): the file to create nodes from (command line argument)
+            label (str): the label to give to the .dot files (command line argument)
+            debug (bool): Optional, check the result with is_heap after heapifying
+            echo (bool): Optional, also print the .dot files to stdout
+            workers (int): Optional, the number of processes to read the input with
+            stats (Stats): Optional, record phase times and operation counts in stats
+            priority (Priority): Optional, what to order the paths by, path length if None
+            arity (int): Optional, the number of children each node can have
+            trie (bool): Optional, intern the paths in a prefix trie as they are read
+
+        raise:
+            ValueError if arity is less than 2
+        """
+        super().__init__(input_file, label, debug, echo, workers, stats, priority, arity, trie)
+        # start with a placeholder at 0 so children are at 2i and 2i + 1
+        self.nodes = [None]
+
+    @classmethod
+    def load_snapshot(cls, file_name, label, **options):
+        """
+        Makes a heap from a snapshot written by save_snapshot. The snapshot is only
+        memory mapped, so the heap can be printed and checked right away without
+        reading, building or heapifying. The nodes are read only until they are
+        copied into a list.
+
+        args:
+            file_name (str): The snapshot file to load
+            label (str): the label to give to the .dot files
+            options: Any of the other Heap options (debug, echo, workers, stats,
+                     priority, arity), priority and arity have to be the ones the
+                     snapshot was saved with, the saved arity is used if none is given
+
+        returns:
+            ArrayHeap: The heap the snapshot was saved from
+
+        raise:
+            ValueError if the file is not a heap snapshot or was saved with another
+            priority or arity
+        """
+        nodes = Snapshot.SnapshotNodes(file_name)
+        if not Snapshot.ordered_by(nodes.flags, nodes.key, options.get("priority")):
+            nodes.close()
+            raise ValueError("\nError! " + file_name + " was saved with another key, tie break "
+                             "or max heap setting.\n")
+        if options.setdefault("arity", nodes.arity) != nodes.arity:
+            nodes.close()
+            raise ValueError("\nError! " + file_name + " holds a " + str(nodes.arity)
+                             + "-ary heap, not a " + str(options["arity"]) + "-ary one.\n")
+        heap = cls(file_name, label, **options)
+        heap.nodes = nodes
+        heap.root = 1 if len(heap.nodes) > 1 else None
+        return heap
+
+    def build_complete_tree(self, index, parent=None):
+        """
+        Takes the paths in temp_path and creates a PathNode for each of them in the
+        nodes list. The position in the list is the position in the tree so nothing
+        has to be linked.
+
+        args:
+            index (int): The index of the root of the tree (always 1)
+            parent: Unused, kept so the signature matches Heap
+
+        returns:
+            index (int): The index of the root, None if there are no paths
+        """
+        self.nodes = [None]
+        for path in self.temp_path[index:]:
+            node = self.make_node(path)
+            node.position = len(self.nodes)
+            self.nodes.append(node)
+
+        self.root = index if len(self.nodes) > index else None
+        return self.root
+
+    def set_level_end(self, root):
+        """
+        Level ends are the indexes 2^k - 1 (or the last index of every power of
+        the arity) so there is nothing to set.
+
+        Args:
+            root (int): The index we are currently at.
+        """
+
+    def set_generation_links(self, root):
+        """
+        The node to the right of index i on the same level is i + 1 so there are
+        no generation links to set.
+
+        args:
+            root (int): The index we are currently at.
+        """
+
+    def level_order(self, root):
+        """
+        Generates the nodes under root level by level, left to right, with their
+        level and number. The nodes of a level below root are a run of indexes
+        that starts at the first child of the level's first index and ends at
+        the last child of its last index.
+
+        Args:
+            root (int): The index of the root of the tree
+
+        Yields:
+            tuple: The (level, index, node) of the next node, root is level 0 and
+                   index 0
+        """
+        nodes = self.nodes
+        size = len(nodes)
+        arity = self.arity
+        level = 0
+        index = 0
+        first = last = root
+        while root is not None and first < size:
+            for position in range(first, min(last + 1, size)):
+                yield level, index, nodes[position]
+                index += 1
+            first = arity * (first - 1) + 2
+            last = arity * last + 1
+            level += 1
+
+    def level_nodes(self, root):
+        """
+        Generates the nodes of the tree level by level, left to right, which for
+        the whole tree is just the order of the nodes list.
+
+        Args:
+            root (int): The index of the root of the tree
+
+        Yields:
+            PathNode: The next node in level order
+        """
+        if root != 1:
+            yield from super().level_nodes(root)
+            return
+        nodes = self.nodes
+        for position in range(root, len(nodes)):
+            yield nodes[position]
+
+    def heapify(self, root):
+        """
+        Heapifys the tree in a single bottom up pass (Floyd's build heap), going
+        from the last node with children back to the root and sifting each one
+        down to where it belongs.
+
+        args:
+            root (int): The index to stop at (the root of the tree)
+        """
+        if root is None:
+            return
+
+        # the last node with children is the parent of the last node
+        for position in range(self.parent(len(self.nodes) - 1), root - 1, -1):
+            self.sift_down(position)
+
+        if self.stats:
+            self.stats.count("heapify_passes")
+
+    def sift_down(self, root):
+        """
+        Moves the node at root down by moving smaller children up into the hole
+        it leaves, then drops the node into the final hole. This is the same as
+        swapping with the smallest child (leftmost on ties) over and over, but
+        writes each slot only once.
+
+        args:
+            root (int): The index of the node to sift down
+        """
+        nodes = self.nodes
+        size = len(nodes)
+        arity = self.arity
+        node = nodes[root]
+        start = root
+
+        if arity == 2:
+            # the binary case is the common one and a loop over 1 sibling is slow
+            child = 2 * root
+            while child < size:
+                # take the right child only if it is strictly smaller
+                if child + 1 < size and nodes[child + 1] < nodes[child]:
+                    child += 1
+                if not nodes[child] < node:
+                    break
+                nodes[root] = nodes[child]
+                nodes[root].position = root
+                root = child
+                child = 2 * root
+        else:
+            child = arity * (root - 1) + 2
+            while child < size:
+                # take a later child only if it is strictly smaller
+                smallest = nodes[child]
+                for other in range(child + 1, min(child + arity, size)):
+                    if nodes[other] < smallest:
+                        child, smallest = other, nodes[other]
+                if not smallest < node:
+                    break
+                nodes[root] = smallest
+                smallest.position = root
+                root = child
+                child = arity * (root - 1) + 2
+        nodes[root] = node
+        node.position = root
+
+        # every level the node moved down was one swap
+        if self.stats:
+            self.stats.count("swaps", self.depth(root) - self.depth(start))
+
+    def sift_up(self, root):
+        """
+        Moves the node at root up by moving bigger parents down into the hole it
+        leaves, then drops the node into the final hole.
+
+        args:
+            root (int): The index of the node to sift up
+        """
+        nodes = self.nodes
+        arity = self.arity
+        node = nodes[root]
+        start = root
+        while root > 1:
+            parent = (root - 2) // arity + 1
+            if not node < nodes[parent]:
+                break
+            nodes[root] = nodes[parent]
+            nodes[root].position = root
+            root = parent
+        nodes[root] = node
+        node.position = root
+
+        # every level the node moved up was one swap
+        if self.stats:
+            self.stats.count("swaps", self.depth(start) - self.depth(root))
+
+    def own_nodes(self):
+        """
+        Copies the nodes into a list if they are still the read only nodes of a
+        snapshot, so they can be changed.
+        """
+        if not isinstance(self.nodes, list):
+            snapshot = self.nodes
+            self.nodes = list(snapshot)
+            snapshot.close()
+            for position in range(1, len(self.nodes)):
+                self.nodes[position].position = position
+
+    def __len__(self):
+        """
+        Gives the number of nodes in the heap
+
+        Return:
+            int: The number of nodes
+        """
+        return len(self.nodes) - 1
+
+    def push(self, path):
+        """
+        Adds a path to the heap.
+
+        args:
+            path (PathNode, bytes, str or list): The path to add, anything PathNode takes
+
+        returns:
+            PathNode: The node holding the path, the handle for decrease_key and remove
+        """
+        self.own_nodes()
+        node = path if isinstance(path, PathNode) else self.make_node(path)
+        self.nodes.append(node)
+        self.root = 1
+        self.sift_up(len(self.nodes) - 1)
+        self.check_heap()
+        return node
+
+    def peek(self):
+        """
+        Gives the node with the shortest path without taking it out.
+
+        returns:
+            PathNode: The top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        if len(self.nodes) < 2:
+            raise IndexError("peek from an empty heap")
+        return self.nodes[1]
+
+    def pop(self):
+        """
+        Takes the node with the shortest path out of the heap.
+
+        returns:
+            PathNode: The old top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        if len(self.nodes) < 2:
+            raise IndexError("pop from an empty heap")
+        self.own_nodes()
+        return self.remove(self.nodes[1])
+
+    def pushpop(self, path):
+        """
+        Adds a path and then takes out the shortest path, faster than a push
+        followed by a pop.
+
+        args:
+            path (PathNode, bytes, str or list): The path to add
+
+        returns:
+            PathNode: The node with the shortest path, which may be the new one
+        """
+        node = path if isinstance(path, PathNode) else self.make_node(path)
+        # the new node would come right back out
+        if len(self.nodes) < 2 or not self.nodes[1] < node:
+            return node
+        return self.swap_top(node)
+
+    def replace(self, path):
+        """
+        Takes out the shortest path and then adds a path, the new path can be
+        longer than the one taken out.
+
+        args:
+            path (PathNode, bytes, str or list): The path to add
+
+        returns:
+            PathNode: The old top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        if len(self.nodes) < 2:
+            raise IndexError("replace on an empty heap")
+        return self.swap_top(path if isinstance(path, PathNode) else self.make_node(path))
+
+    def swap_top(self, node):
+        """
+        Puts node at the top of the heap in place of the old top and sifts it down.
+
+        args:
+            node (PathNode): The node to put in
+
+        returns:
+            PathNode: The old top of the heap
+        """
+        self.own_nodes()
+        top = self.nodes[1]
+        top.position = None
+        self.nodes[1] = node
+        self.sift_down(1)
+        self.check_heap()
+        return top
+
+    def decrease_key(self, handle, path):
+        """
+        Gives a node in the heap a new path that is no longer than its old one and
+        moves it up to where it belongs.
+
+        args:
+            handle (PathNode): The node to change, as returned by push
+            path (bytes, str or list): The new path
+
+        raise:
+            ValueError if the node isn't in the heap or the new path is longer
+        """
+        node = self.make_node(path)
+        if handle < node:
+            raise ValueError("\nError! decrease_key can't make a path longer.\n")
+        self.own_nodes()
+        position = self.position_of(handle)
+        handle.line, handle.priority = node.line, node.priority
+        self.sift_up(position)
+        self.check_heap()
+
+    def remove(self, handle):
+        """
+        Takes a node out of the heap wherever it is.
+
+        args:
+            handle (PathNode): The node to take out, as returned by push
+
+        returns:
+            PathNode: The node that was taken out
+
+        raise:
+            ValueError if the node isn't in the heap
+        """
+        self.own_nodes()
+        position = self.position_of(handle)
+        nodes = self.nodes
+        last = nodes.pop()
+        handle.position = None
+
+        # move the last node into the hole unless the hole was the last node
+        if position < len(nodes):
+            nodes[position] = last
+            last.position = position
+            if position > 1 and last < nodes[self.parent(position)]:
+                self.sift_up(position)
+            else:
+                self.sift_down(position)
+
+        if len(nodes) < 2:
+            self.root = None
+        self.check_heap()
+        return handle
+
+    def smallest(self, count):
+        """
+        Gives the count shortest paths without taking them out. Only the nodes
+        next to the ones already picked can be the next shortest, so this looks at
+        O(count * arity) nodes however big the heap is.
+
+        args:
+            count (int): The number of nodes to give
+
+        returns:
+            list: The nodes with the shortest paths, shortest first
+        """
+        nodes = self.nodes
+        picked = []
+        # (priority, index) of the nodes that could be picked next
+        frontier = [(nodes[1].priority, 1)] if len(nodes) > 1 and count > 0 else []
+        while frontier and len(picked) < count:
+            priority, position = heapq.heappop(frontier)
+            picked.append(nodes[position])
+            for child in self.children(position):
+                heapq.heappush(frontier, (nodes[child].priority, child))
+        return picked
+
+    def position_of(self, handle):
+        """
+        Finds the index of a node in the heap.
+
+        args:
+            handle (PathNode): The node to find
+
+        returns:
+            int: The index of the node
+
+        raise:
+            ValueError if the node isn't in the heap
+        """
+        position = handle.position
+        if position is None or position >= len(self.nodes) or self.nodes[position] is not handle:
+            raise ValueError("\nError! That node isn't in the heap.\n")
+        return position
+
+    def double_swap(self, root, root_left, root_right):
+        """
+        If the root has 2 children then if left is smaller than right, swap root with left,
+        if right is smaller than left, swap root right, if children are equal then swap
+        with left.
+
+        Args:
+            root (int): The index we are at
+            root_left (int): The index of the left child
+            root_right (int): The index of the right child
+
+        Return:
+            True if a swap was made, False otherwise
+        """
+        if self.nodes[root_right] < self.nodes[root_left]:
+            return self.right_swap(root, root_right)
+        return self.left_swap(root, root_left)
+
+    def right_swap(self, root, root_right):
+        """
+        If the right child is smaller than the root make the swap with right child.
+
+        Args:
+            root (int): The index we are at
+            root_right (int): The index of the right child
+
+        Return:
+            True if the swap was made, False otherwise
+        """
+        return self.swap(root, root_right)
+
+    def left_swap(self, root, root_left):
+        """
+        If the left child is smaller than the root make a swap with left child.
+
+        Args:
+            root (int): The index we are at
+            root_left (int): The index of the left child
+
+        Return:
+            True if the swap was made, False otherwise
+        """
+        return self.swap(root, root_left)
+
+    def swap(self, root, child):
+        """
+        Exchanges the nodes at root and child if the child is smaller.
+
+        Args:
+            root (int): The index we are at
+            child (int): The index of one of its children
+
+        Return:
+            True if the swap was made, False otherwise
+        """
+        nodes = self.nodes
+        if nodes[child] < nodes[root]:
+            nodes[root], nodes[child] = nodes[child], nodes[root]
+            nodes[root].position, nodes[child].position = root, child
+            if self.stats:
+                self.stats.count("swaps")
+            return True
+        return False
+
+    def is_heap(self, root):
+        """
+        Checks if the tree is a complete heap by making sure no node is smaller
+        than its parent.
+
+        Args:
+            root (int): The index of the root of the tree
+
+        Return:
+            boolean: True if tree is a heap, False otherwise
+        """
+        nodes = self.nodes
+        arity = self.arity
+        for position in range(root + 1, len(nodes)):
+            if nodes[position] < nodes[(position - 2) // arity + 1]:
+                return False
+        return True
+
+    def depth(self, position):
+        """
+        Gives the level of position in the tree, the root is on level 0
+
+        Args:
+            position (int): The index we are currently at
+
+        Return:
+            int: The number of levels above position
+        """
+        if self.arity == 2:
+            return position.bit_length() - 1
+        level = 0
+        while position > 1:
+            position = (position - 2) // self.arity + 1
+            level += 1
+        return level
+
+    def parent(self, position):
+        """
+        Gives the index of the parent of position
+
+        Args:
+            position (int): The index we are currently at (not the root)
+
+        Return:
+            The index of the parent
+        """
+        return (position - 2) // self.arity + 1
+
+    def children(self, root):
+        """
+        Gives the indexes of the children of root, left to right
+
+        Args:
+            root (int): The index we are currently at
+
+        Return:
+            range: The indexes of the children, empty for a leaf
+        """
+        first = self.arity * (root - 1) + 2
+        return range(first, min(first + self.arity, len(self.nodes)))
+
+    def node_at(self, root):
+        """
+        Gives the node at an index
+
+        Args:
+            root (int): The index we are currently at
+
+        Return:
+            PathNode: The node at root
+        """
+        return self.nodes[root]
+
+    def subtree_root(self, root, number):
+        """
+        Finds the index of the node with a number in the level order numbering
+        under root (the numbers the .dot files give the nodes). Every level but
+        the last one under root is full, so the level of the number is found by
+        taking away the size of each level above it.
+
+        Args:
+            root (int): The index of the root of the tree
+            number (int): The number of the node, root is 0
+
+        Return:
+            int: The index of the node
+
+        raise:
+            ValueError if the tree doesn't have that many nodes
+        """
+        first, width, offset = root, 1, number
+        while offset >= width and first < len(self.nodes):
+            offset -= width
+            first = self.arity * (first - 1) + 2
+            width *= self.arity
+        if first + offset >= len(self.nodes):
+            raise ValueError("\nError! The heap has no node " + str(number) + ".\n")
+        return first + offset
+
+    def subtree_size(self, root):
+        """
+        Counts the nodes under and including root from the run of indexes each
+        level of the subtree takes, without visiting them.
+
+        Args:
+            root (int): The index of the root of the subtree
+
+        Return:
+            int: The number of nodes
+        """
+        size = len(self.nodes)
+        count = 0
+        first = last = root
+        while first < size:
+            count += min(last, size - 1) - first + 1
+            first = self.arity * (first - 1) + 2
+            last = self.arity * last + 1
+        return count
+
+    def left(self, root):
+        """
+        Gives the index of the left (first) child of root
+
+        Args:
+            root (int): The index we are currently at
+
+        Return:
+            The index of the left child, None if there isn't one
+        """
+        children = self.children(root)
+        return children[0] if children else None
+
+    def right(self, root):
+        """
+        Gives the index of the right (last) child of root
+
+        Args:
+            root (int): The index we are currently at
+
+        Return:
+            The index of the right child, None if there isn't one
+        """
+        children = self.children(root)
+        return children[-1] if len(children) > 1 else None
+
+    def is_root(self, root):
+        """
+        Checks if the index we are at is the root of the entire tree
+
+        Args:
+            root (int): The index we are currently at
+        """
+        return root == 1
+
+    def leaf(self, root):
+        """
+        Checks if the index we are at is a leaf
+
+        Args:
+            root (int): The index we are currently at
+        """
+        return self.arity * (root - 1) + 2 >= len(self.nodes)
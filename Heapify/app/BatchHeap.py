@@ -0,0 +1,294 @@
+"""
+This file heapifies many small listings at once with NumPy instead of making a
+Heap (and a PathNode for every path) per listing. The priorities of every
+listing are kept end to end in one array, with each listing's heap starting at
+its offset, and Floyd's build heap is run for all of them together: the nodes of
+one level of every heap are sifted down at the same time, a level at a time from
+the bottom up. Nodes on the same level have separate subtrees, so this moves the
+paths exactly the way ArrayHeap.heapify does, leftmost child on ties included.
+
+Only the priorities and the slot each path ends up in are arrays, the paths stay
+bytes. The .dot files are only made for the listings they are asked for.
+
+NumPy is optional, the rest of the program doesn't need it.
+"""
+
+from ArrayHeap import ArrayHeap
+import PathReader
+import numbers
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def require_numpy():
+    """
+    Makes sure NumPy can be used.
+
+    raise:
+        ImportError if NumPy isn't installed
+    """
+    if numpy is None:
+        raise ImportError("BatchHeap needs NumPy, install it with: pip install numpy")
+
+def clean_paths(listing, name):
+    """
+    Gets the single spaced paths of one listing.
+
+    Args:
+        listing (str or list): A file name, or the paths themselves (bytes or str)
+        name (str): What to call the listing in errors
+
+    Return:
+        list: The paths as single spaced bytes
+
+    raise:
+        ValueError if the listing contains a node with an empty path
+    """
+    if isinstance(listing, str):
+        # small files are cheaper to read in one go than to map
+        with open(listing, "rb") as file:
+            lines = [file.read()]
+        if not lines[0]:
+            return []
+    else:
+        lines = [line.encode() if isinstance(line, str) else line for line in listing]
+        if not lines:
+            return lines
+        lines.append(b"")
+
+    # the paths are parsed like a chunk of a file so they are only cleaned if they need it
+    paths, bad = PathReader.parse_chunk(b"\n".join(lines))
+    if bad is not None:
+        raise PathReader.empty_path_error(name, bad + 1)
+    return paths
+
+def key_array(paths, priority):
+    """
+    Works out the priority of every path as a NumPy array that orders the paths
+    the same way their PathNodes would. Priorities that aren't numbers (the
+    tuples of a tie break) are replaced by their rank.
+
+    Args:
+        paths (list): The single spaced paths
+        priority (Priority): What to order the paths by, path length if None
+
+    Return:
+        numpy.ndarray: The key of every path
+    """
+    if not paths:
+        return numpy.zeros(0, dtype=numpy.int64)
+    if priority is None or priority.is_default():
+        # count the spaces of every path at once in the paths joined by new lines
+        text = numpy.frombuffer(b"\n".join(paths) + b"\n", dtype=numpy.uint8)
+        spaces = numpy.concatenate(([0], numpy.cumsum(text == ord(" "))))
+        ends = numpy.flatnonzero(text == ord("\n")) + 1
+        # a blank line has no tokens, like in PathNode
+        blank = numpy.diff(ends, prepend=0) == 1
+        return numpy.where(blank, 0, numpy.diff(spaces[ends], prepend=0) + 1)
+
+    values = [priority(path) for path in paths]
+    if all(isinstance(value, numbers.Real) for value in values):
+        return numpy.array(values, dtype=numpy.float64)
+    ranks = {value: rank for rank, value in enumerate(sorted(set(values)))}
+    return numpy.fromiter((ranks[value] for value in values), numpy.int64, len(values))
+
+class BatchHeap():
+    """
+    BatchHeap class holds many listings in flat arrays and heapifies all of them
+    at once. Listing i takes the slots offsets[i] up to offsets[i + 1], and the
+    slot of its heap index j (1 based, like ArrayHeap) is offsets[i] + j - 1.
+    """
+
+    def __init__(self, listings, priority=None, arity=2):
+        """
+        Reads the listings into one batch, nothing is heapified yet.
+
+        Args:
+            listings (iterable): File names, or lists of paths (bytes or str)
+            priority (Priority): Optional, what to order the paths by, path length if None
+            arity (int): Optional, the number of children each node can have
+
+        raise:
+            ImportError if NumPy isn't installed
+            ValueError if arity is less than 2 or a listing contains a node with an
+            empty path
+        """
+        require_numpy()
+        if arity < 2:
+            raise ValueError("\nError! The BatchHeap engine can't make a " + str(arity)
+                             + "-ary heap.\n")
+        self.priority = priority
+        self.arity = arity
+
+        self.paths = []
+        sizes = []
+        for number, listing in enumerate(listings):
+            name = listing if isinstance(listing, str) else "listing " + str(number)
+            paths = clean_paths(listing, name)
+            self.paths.extend(paths)
+            sizes.append(len(paths))
+
+        self.sizes = numpy.array(sizes, dtype=numpy.int64)
+        self.offsets = numpy.zeros(len(sizes) + 1, dtype=numpy.int64)
+        numpy.cumsum(self.sizes, out=self.offsets[1:])
+        # the key of the path in every slot and which path it is
+        self.keys = key_array(self.paths, priority)
+        self.order = numpy.arange(len(self.paths), dtype=numpy.int64)
+
+    def __len__(self):
+        """
+        Gives the number of listings in the batch
+
+        Return:
+            int: The number of listings
+        """
+        return len(self.sizes)
+
+    def level_nodes(self, first, last):
+        """
+        Finds every node with children whose heap index is between first and
+        last, in every listing.
+
+        Args:
+            first (int): The first heap index of the level
+            last (int): The last heap index of the level
+
+        Return:
+            tuple: The listing of every node and its heap index, as arrays
+        """
+        # the last node with children is the parent of the last node
+        last_parent = numpy.minimum((self.sizes - 2) // self.arity + 1, last)
+        counts = numpy.maximum(last_parent - first + 1, 0)
+        listings = numpy.repeat(numpy.arange(len(self.sizes)), counts)
+        starts = numpy.repeat(numpy.cumsum(counts) - counts, counts)
+        indexes = first + numpy.arange(len(listings)) - starts
+        return listings, indexes
+
+    def heapify(self):
+        """
+        Heapifies every listing, one level of every heap at a time from the
+        bottom up.
+        """
+        if not len(self.paths):
+            return
+
+        # the first heap index of every level down to the last one in the biggest heap
+        firsts = [1]
+        while firsts[-1] <= self.sizes.max():
+            firsts.append(self.arity * (firsts[-1] - 1) + 2)
+
+        for level in range(len(firsts) - 2, -1, -1):
+            listings, indexes = self.level_nodes(firsts[level], firsts[level + 1] - 1)
+            if len(listings):
+                self.sift_down(self.offsets[listings] - 1, self.sizes[listings], indexes)
+
+    def sift_down(self, bases, sizes, indexes):
+        """
+        Sifts down many nodes at once by swapping each one with its smallest
+        child (leftmost on ties) until no child is smaller. The nodes must all
+        have separate subtrees.
+
+        Args:
+            bases (numpy.ndarray): The slot of heap index 0 of every node's listing
+            sizes (numpy.ndarray): The size of every node's listing
+            indexes (numpy.ndarray): The heap index of every node
+        """
+        keys, order, arity = self.keys, self.order, self.arity
+        while len(indexes):
+            child = arity * (indexes - 1) + 2
+            moving = child <= sizes
+            bases, sizes, indexes, child = bases[moving], sizes[moving], indexes[moving], child[moving]
+
+            # take a later child only if it is strictly smaller
+            first = child
+            smallest = keys[bases + child]
+            for step in range(1, arity):
+                other = first + step
+                valid = other <= sizes
+                other_keys = keys[bases + numpy.where(valid, other, first)]
+                better = valid & (other_keys < smallest)
+                child = numpy.where(better, other, child)
+                smallest = numpy.where(better, other_keys, smallest)
+
+            slots = bases + indexes
+            swap = smallest < keys[slots]
+            slots, child_slots = slots[swap], (bases + child)[swap]
+            keys[slots], keys[child_slots] = keys[child_slots], keys[slots]
+            order[slots], order[child_slots] = order[child_slots], order[slots]
+            bases, sizes, indexes = bases[swap], sizes[swap], child[swap]
+
+    def heap_order(self, listing):
+        """
+        Gives the paths of one listing in the order of its heap array.
+
+        Args:
+            listing (int): The number of the listing
+
+        Return:
+            list: The paths, the root first
+        """
+        paths = self.paths
+        start, end = self.offsets[listing], self.offsets[listing + 1]
+        return [paths[number] for number in self.order[start:end].tolist()]
+
+    def heap_orders(self):
+        """
+        Gives the heap order of every listing.
+
+        Return:
+            list: One list of paths per listing, see heap_order
+        """
+        return [self.heap_order(listing) for listing in range(len(self.sizes))]
+
+    def to_heap(self, listing, label, echo=False):
+        """
+        Makes an ArrayHeap out of one heapified listing, for rendering or for
+        using it as a live heap.
+
+        Args:
+            listing (int): The number of the listing
+            label (str): The label to give to the heap's .dot files
+            echo (bool): Optional, also print the .dot files to stdout
+
+        Return:
+            ArrayHeap: The heap, already in heap order
+        """
+        heap = ArrayHeap(None, label, echo=echo, priority=self.priority, arity=self.arity)
+        heap.temp_path = [0] + self.heap_order(listing)
+        heap.build_complete_tree(1)
+        heap.temp_path = [0]
+        return heap
+
+    def write_dot(self, listing, label, echo=False):
+        """
+        Writes the .dot file of one heapified listing to <label>After.dot.
+
+        Args:
+            listing (int): The number of the listing
+            label (str): The label to give to the .dot file
+            echo (bool): Optional, also print it to stdout
+        """
+        heap = self.to_heap(listing, label, echo)
+        heap.write_dot(label + "After.dot", heap.root, False)
+
+def heapify_listings(listings, priority=None, arity=2):
+    """
+    Heapifies many listings at once.
+
+    Args:
+        listings (iterable): File names, or lists of paths (bytes or str)
+        priority (Priority): Optional, what to order the paths by, path length if None
+        arity (int): Optional, the number of children each node can have
+
+    Return:
+        list: The paths of every listing in heap order
+
+    raise:
+        ImportError if NumPy isn't installed
+        ValueError if a listing contains a node with an empty path
+    """
+    batch = BatchHeap(listings, priority, arity)
+    batch.heapify()
+    return batch.heap_orders()
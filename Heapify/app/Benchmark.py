@@ -0,0 +1,329 @@
+"""
+This file benchmarks the heap pipeline one phase at a time. It writes synthetic
+path listings (random, already sorted, reverse sorted, all one length and heavy
+tailed lengths) of the sizes asked for, then times read_paths,
+build_complete_tree, set_level_end, heapify, the .dot
+rendering and popping a tenth of the paths separately for each engine (and each
+arity of the array engine). It reports seconds, paths per second and peak traced
+memory for every phase, and a scaling exponent for every phase across the sizes
+(1 is linear), all as JSON.
+
+usage: python3 Benchmark.py [--sizes N ...] [--distributions NAME ...]
+                            [--engines array|tree|pairing ...] [--arities D ...]
+                            [--repeat N] [--no-memory] [--output FILE]
+"""
+
+from ArrayHeap import ArrayHeap
+from Heap import Heap
+from PairingHeap import PairingHeap
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import tempfile
+import time
+import tracemalloc
+
+ENGINES = {"array": ArrayHeap, "tree": Heap, "pairing": PairingHeap}
+PHASES = ("read", "build", "link", "heapify", "render", "pop")
+# the part of the paths taken out in the pop phase
+POP_FRACTION = 10
+
+def random_lengths(size, rng):
+    """
+    Path lengths spread evenly between 1 and 20 hops.
+
+    Args:
+        size (int): The number of paths
+        rng (random.Random): The random number generator to use
+
+    Return:
+        list: The number of hops of each path
+    """
+    return [rng.randint(1, 20) for _ in range(size)]
+
+def sorted_lengths(size, rng):
+    """
+    Random path lengths shortest first, the listing is already a heap.
+
+    Args:
+        size (int): The number of paths
+        rng (random.Random): The random number generator to use
+
+    Return:
+        list: The number of hops of each path
+    """
+    return sorted(random_lengths(size, rng))
+
+def reversed_lengths(size, rng):
+    """
+    Random path lengths longest first, the most work for heapify.
+
+    Args:
+        size (int): The number of paths
+        rng (random.Random): The random number generator to use
+
+    Return:
+        list: The number of hops of each path
+    """
+    return sorted(random_lengths(size, rng), reverse=True)
+
+def equal_lengths(size, rng):
+    """
+    Every path has 8 hops, so every comparison is a tie.
+
+    Args:
+        size (int): The number of paths
+        rng (random.Random): The random number generator to use
+
+    Return:
+        list: The number of hops of each path
+    """
+    return [8] * size
+
+def heavy_tailed_lengths(size, rng):
+    """
+    Pareto distributed path lengths, mostly short with a few very long paths
+    (capped at 1000 hops).
+
+    Args:
+        size (int): The number of paths
+        rng (random.Random): The random number generator to use
+
+    Return:
+        list: The number of hops of each path
+    """
+    return [min(int(rng.paretovariate(1.5)), 1000) for _ in range(size)]
+
+DISTRIBUTIONS = {
+    "random": random_lengths,
+    "sorted": sorted_lengths,
+    "reversed": reversed_lengths,
+    "equal": equal_lengths,
+    "heavy_tailed": heavy_tailed_lengths,
+}
+
+def write_listing(file_name, lengths, rng):
+    """
+    Writes a listing in the same format as listing1.txt, every path starts at 0
+    and visits random nodes.
+
+    Args:
+        file_name (str): The file to write
+        lengths (list): The number of hops of each path
+        rng (random.Random): The random number generator to use
+    """
+    with open(file_name, "w") as file:
+        lines = []
+        for hops in lengths:
+            lines.append("0 " + " ".join(str(rng.randint(1, 99)) for _ in range(hops)) + "\n")
+            if len(lines) == 65536:
+                file.writelines(lines)
+                lines = []
+        file.writelines(lines)
+
+def run_phases(engine, input_file, work_dir, memory, arity=2):
+    """
+    Runs every phase of go on input_file and measures each one, then pops a
+    tenth of the paths if the engine can pop.
+
+    Args:
+        engine (class): Heap or ArrayHeap
+        input_file (str): The listing to heapify
+        work_dir (str): Where to write the .dot file
+        memory (bool): Trace memory (slower) instead of timing
+        arity (int): Optional, the number of children per node
+
+    Return:
+        dict: For every phase the engine has, its seconds or its peak traced bytes
+    """
+    heap = engine(input_file, os.path.join(work_dir, "bench"), echo=False, arity=arity)
+    steps = {
+        "read": lambda: heap.read_paths(input_file),
+        "build": lambda: heap.build_complete_tree(1),
+        "link": lambda: heap.set_level_end(heap.root),
+        "heapify": lambda: heap.heapify(heap.root),
+        "render": lambda: heap.write_dot(heap.label + "After.dot", heap.root, False),
+    }
+    if hasattr(heap, "pop"):
+        steps["pop"] = lambda: [heap.pop() for _ in range(len(heap) // POP_FRACTION)]
+
+    measured = {}
+    for phase in PHASES:
+        if phase not in steps:
+            continue
+        if memory:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            steps[phase]()
+            measured[phase] = tracemalloc.get_traced_memory()[1] - before
+        else:
+            start = time.perf_counter()
+            steps[phase]()
+            measured[phase] = time.perf_counter() - start
+    return measured
+
+def benchmark(sizes, distributions, engines, repeat=1, memory=True, seed=1, arities=(2,)):
+    """
+    Benchmarks every engine on every distribution at every size.
+
+    Args:
+        sizes (list): The numbers of paths to try
+        distributions (list): Names from DISTRIBUTIONS
+        engines (list): Names from ENGINES
+        repeat (int): Optional, the number of timed runs, the fastest is kept
+        memory (bool): Optional, also do a traced run for peak memory
+        seed (int): Optional, the seed for the listings
+        arities (list): Optional, the numbers of children per node to try, the tree
+                        engine is only run with 2
+
+    Return:
+        list: One result dict per engine, arity, distribution and size
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_file = os.path.join(work_dir, "listing.txt")
+        for distribution in distributions:
+            for size in sizes:
+                rng = random.Random(seed)
+                write_listing(input_file, DISTRIBUTIONS[distribution](size, rng), rng)
+                for engine, arity in cases(engines, arities):
+                    runs = [run_phases(ENGINES[engine], input_file, work_dir, False, arity)
+                            for _ in range(repeat)]
+                    phases = {}
+                    for phase in runs[0]:
+                        seconds = min(run[phase] for run in runs)
+                        phases[phase] = {
+                            "seconds": seconds,
+                            "paths_per_second": size / seconds if seconds else None,
+                        }
+
+                    if memory:
+                        tracemalloc.start()
+                        peaks = run_phases(ENGINES[engine], input_file, work_dir, True, arity)
+                        tracemalloc.stop()
+                        for phase in peaks:
+                            phases[phase]["peak_bytes"] = peaks[phase]
+
+                    results.append({
+                        "engine": engine,
+                        "arity": arity,
+                        "distribution": distribution,
+                        "size": size,
+                        "phases": phases,
+                        "total_seconds": sum(phase["seconds"] for phase in phases.values()),
+                    })
+    return results
+
+def cases(engines, arities):
+    """
+    Pairs every engine with the arities it can run with.
+
+    Args:
+        engines (list): Names from ENGINES
+        arities (list): The numbers of children per node to try
+
+    Return:
+        list: The (engine, arity) pairs to benchmark
+    """
+    pairs = []
+    for engine in engines:
+        allowed = ENGINES[engine].ARITIES
+        pairs.extend((engine, arity) for arity in arities if not allowed or arity in allowed)
+    return pairs
+
+def scaling(results):
+    """
+    Fits how each phase grows with size as the slope of log(seconds) against
+    log(size) between the smallest and largest size, 1 is linear and 2 is
+    quadratic.
+
+    Args:
+        results (list): The results from benchmark
+
+    Return:
+        list: One dict per engine, arity, distribution and phase with its exponent
+    """
+    curves = {}
+    for result in results:
+        key = (result["engine"], result["arity"], result["distribution"])
+        curves.setdefault(key, []).append(result)
+
+    exponents = []
+    for (engine, arity, distribution), curve in curves.items():
+        curve.sort(key=lambda result: result["size"])
+        first, last = curve[0], curve[-1]
+        for phase in PHASES + ("total",):
+            if phase != "total" and phase not in first["phases"]:
+                continue
+            if phase == "total":
+                low, high = first["total_seconds"], last["total_seconds"]
+            else:
+                low, high = first["phases"][phase]["seconds"], last["phases"][phase]["seconds"]
+            exponent = None
+            if last["size"] > first["size"] and low > 0 and high > 0:
+                exponent = math.log(high / low) / math.log(last["size"] / first["size"])
+            exponents.append({
+                "engine": engine,
+                "arity": arity,
+                "distribution": distribution,
+                "phase": phase,
+                "sizes": [result["size"] for result in curve],
+                "seconds": [result["total_seconds"] if phase == "total"
+                            else result["phases"][phase]["seconds"] for result in curve],
+                "exponent": exponent,
+            })
+    return exponents
+
+def parse_args(argv=None):
+    """
+    Reads the command line arguments.
+
+    Args:
+        argv (list): Optional, the arguments to read, sys.argv[1:] if None
+
+    Return:
+        argparse.Namespace: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python3 Benchmark.py")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="numbers of paths to benchmark (up to 10000000)")
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS),
+                        choices=DISTRIBUTIONS, help="listing shapes to benchmark")
+    parser.add_argument("--engines", nargs="+", default=["array"], choices=ENGINES,
+                        help="heap engines to benchmark")
+    parser.add_argument("--arities", type=int, nargs="+", default=[2], metavar="D",
+                        help="children per node to benchmark the array engine with")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="timed runs per case, the fastest is reported")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the traced run that measures peak memory")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON report to FILE instead of stdout")
+    return parser.parse_args(argv)
+
+def main():
+    """
+    Runs the benchmark from the command line and writes the JSON report.
+    """
+    args = parse_args()
+    results = benchmark(args.sizes, args.distributions, args.engines,
+                        args.repeat, not args.no_memory, arities=args.arities)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "scaling": scaling(results),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+# call main function
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+"""
+This file contains a thread safe version of the array heap. Every operation
+holds the heap's lock for as little as it can: nodes (and their priorities) are
+made before the lock is taken and only the sifting happens inside it. The
+pointer tree can't be shared like this, a swap rewires the pointers of several
+nodes at once, but an array heap only moves nodes between slots of its list.
+
+push_many and pop_many do a whole batch of pushes or pops under one hold of the
+lock, so threads that push or pop a lot take the lock far less often. A large
+batch pushed into a small heap is heapified all at once instead of being sifted
+up one node at a time.
+"""
+
+import threading
+
+from ArrayHeap import ArrayHeap
+from PathNode import PathNode
+
+class ConcurrentHeap(ArrayHeap):
+    """
+    ConcurrentHeap class is an ArrayHeap that many threads can push to and pop
+    from at the same time. Load it (with go or read_paths, build_complete_tree
+    and heapify) before the threads start.
+    """
+
+    def __init__(self, input_file, label, debug=False, echo=True, workers=1, stats=None,
+                 priority=None, arity=2, trie=False):
+        """
+        Creates a concurrent heap object, same as ArrayHeap but with a lock.
+
+        args:
+            input_file (str): the file to create nodes from (command line argument)
+            label (str): the label to give to the .dot files (command line argument)
+            debug (bool): Optional, check the result with is_heap after every change
+            echo (bool): Optional, also print the .dot files to stdout
+            workers (int): Optional, the number of processes to read the input with
+            stats (Stats): Optional, record phase times and operation counts in stats
+            priority (Priority): Optional, what to order the paths by, path length if None
+            arity (int): Optional, the number of children each node can have
+            trie (bool): Optional, intern the paths in a prefix trie as they are read
+
+        raise:
+            ValueError if arity is less than 2
+        """
+        super().__init__(input_file, label, debug, echo, workers, stats, priority, arity, trie)
+        self.lock = threading.Lock()
+        # pop_many waits on this for pushes when asked to
+        self.not_empty = threading.Condition(self.lock)
+
+    def node(self, path):
+        """
+        Makes the node for a path outside of the lock, unless it already is one.
+
+        args:
+            path (PathNode, bytes, str or list): The path
+
+        returns:
+            PathNode: The node for the path
+        """
+        return path if isinstance(path, PathNode) else self.make_node(path)
+
+    def __len__(self):
+        """
+        Gives the number of nodes in the heap
+
+        Return:
+            int: The number of nodes
+        """
+        with self.lock:
+            return super().__len__()
+
+    def push(self, path):
+        """
+        Adds a path to the heap.
+
+        args:
+            path (PathNode, bytes, str or list): The path to add, anything PathNode takes
+
+        returns:
+            PathNode: The node holding the path, the handle for decrease_key and remove
+        """
+        node = self.node(path)
+        with self.lock:
+            super().push(node)
+            self.not_empty.notify()
+        return node
+
+    def push_many(self, paths):
+        """
+        Adds many paths to the heap under one hold of the lock. When the batch is
+        bigger than the heap it is added to the end and the heap is heapified
+        (O(n + k)), otherwise every node is sifted up (O(k log n)).
+
+        args:
+            paths (iterable): The paths to add, anything PathNode takes
+
+        returns:
+            list: The nodes holding the paths, in the order they were given
+        """
+        nodes = [self.node(path) for path in paths]
+        if not nodes:
+            return nodes
+        with self.lock:
+            self.own_nodes()
+            heap = self.nodes
+            start = len(heap)
+            for node in nodes:
+                node.position = len(heap)
+                heap.append(node)
+            self.root = 1
+
+            # everything before a position is already a heap when it is sifted up
+            if len(nodes) >= start:
+                self.heapify(1)
+            else:
+                for position in range(start, len(heap)):
+                    self.sift_up(position)
+            self.check_heap()
+            self.not_empty.notify_all()
+        return nodes
+
+    def peek(self):
+        """
+        Gives the node with the shortest path without taking it out.
+
+        returns:
+            PathNode: The top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        with self.lock:
+            return super().peek()
+
+    def smallest(self, count):
+        """
+        Gives the count shortest paths without taking them out, while no other
+        thread is changing the heap.
+
+        args:
+            count (int): The number of nodes to give
+
+        returns:
+            list: The nodes with the shortest paths, shortest first
+        """
+        with self.lock:
+            return super().smallest(count)
+
+    def pop(self):
+        """
+        Takes the node with the shortest path out of the heap.
+
+        returns:
+            PathNode: The old top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        with self.lock:
+            return self.take_top()
+
+    def take_top(self):
+        """
+        Takes the top out while the lock is already held. ArrayHeap.pop goes
+        through remove, which takes the lock again.
+
+        returns:
+            PathNode: The old top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        if len(self.nodes) < 2:
+            raise IndexError("pop from an empty heap")
+        self.own_nodes()
+        return super().remove(self.nodes[1])
+
+    def pop_many(self, count, timeout=None):
+        """
+        Takes up to count of the shortest paths out of the heap under one hold of
+        the lock. The nodes come out shortest first.
+
+        args:
+            count (int): The most nodes to take
+            timeout (float): Optional, how long to wait for a push if the heap is
+                             empty, don't wait if None
+
+        returns:
+            list: The nodes taken out, empty if the heap stayed empty
+        """
+        nodes = []
+        with self.lock:
+            if timeout is not None:
+                self.not_empty.wait_for(lambda: len(self.nodes) > 1, timeout)
+            while len(nodes) < count and len(self.nodes) > 1:
+                nodes.append(self.take_top())
+        return nodes
+
+    def pushpop(self, path):
+        """
+        Adds a path and then takes out the shortest path.
+
+        args:
+            path (PathNode, bytes, str or list): The path to add
+
+        returns:
+            PathNode: The node with the shortest path, which may be the new one
+        """
+        node = self.node(path)
+        with self.lock:
+            return super().pushpop(node)
+
+    def replace(self, path):
+        """
+        Takes out the shortest path and then adds a path.
+
+        args:
+            path (PathNode, bytes, str or list): The path to add
+
+        returns:
+            PathNode: The old top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        node = self.node(path)
+        with self.lock:
+            return super().replace(node)
+
+    def decrease_key(self, handle, path):
+        """
+        Gives a node in the heap a new path that is no longer than its old one.
+
+        args:
+            handle (PathNode): The node to change, as returned by push
+            path (bytes, str or list): The new path
+
+        raise:
+            ValueError if the node isn't in the heap or the new path is longer
+        """
+        with self.lock:
+            super().decrease_key(handle, path)
+
+    def remove(self, handle):
+        """
+        Takes a node out of the heap wherever it is.
+
+        args:
+            handle (PathNode): The node to take out, as returned by push
+
+        returns:
+            PathNode: The node that was taken out
+
+        raise:
+            ValueError if the node isn't in the heap
+        """
+        with self.lock:
+            return super().remove(handle)
+
+    def check(self):
+        """
+        Checks that the heap is a heap while no other thread is changing it.
+
+        Return:
+            boolean: True if the heap is a heap, False otherwise
+        """
+        with self.lock:
+            return len(self.nodes) < 2 or self.is_heap(1)
+
+    def print_tree_levels(self, root, before):
+        """
+        Creates the whole .dot document in msg while no other thread is changing
+        the heap.
+
+        args:
+            root (PathNode): The root of the tree to print
+            before (bool): True for the before document, False for the after document
+        """
+        with self.lock:
+            super().print_tree_levels(root, before)
+
+    def write_dot(self, file_name, root, before):
+        """
+        Writes the .dot file while no other thread is changing the heap. The lock
+        is held for the whole file, so pushes and pops wait until it is written.
+
+        args:
+            file_name (str): The .dot file to write
+            root (PathNode): The root of the tree to print
+            before (bool): True for the before document, False for the after document
+
+        raise:
+            ValueError if set_render picked a subtree the tree doesn't have
+        """
+        with self.lock:
+            super().write_dot(file_name, root, before)
+
+    def save_snapshot(self, file_name):
+        """
+        Saves the heap to a snapshot file while no other thread is changing it.
+        The lock is held until the whole file is written.
+
+        args:
+            file_name (str): The snapshot file to write
+        """
+        with self.lock:
+            super().save_snapshot(file_name)
@@ -7,7 +7,154 @@ usage of command line arguments.
 """
 
 from Heap import Heap
-import sys
+from ArrayHeap import ArrayHeap
+from ExternalHeap import ExternalHeap
+from PairingHeap import PairingHeap
+from ShardedHeap import ShardedHeap, merge_shards
+import PathReader
+from Priority import Priority, KEYS
+import Snapshot
+from Stats import Stats
+import TopK
+import argparse
+import itertools
+
+# the heap engines that can be picked with the optional third argument
+ENGINES = {"array": ArrayHeap, "tree": Heap, "pairing": PairingHeap}
+
+def parse_args(argv=None):
+    """
+    Reads the command line arguments, argparse prints the usage and exits
+    if they are not valid.
+
+    Args:
+        argv (list): Optional, the arguments to read, sys.argv[1:] if None
+
+    Return:
+        argparse.Namespace: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python3 Driver.py")
+    parser.add_argument("file", help="the file of paths to heapify")
+    parser.add_argument("label", help="the label to give to the .dot files")
+    parser.add_argument("engine", nargs="?", default="array", choices=ENGINES,
+                        help="keep the heap in a flat array (default), a pointer tree "
+                             "or a mergeable pairing heap")
+    parser.add_argument("--arity", type=int, default=2, metavar="D",
+                        help="number of children per node, more than 2 only works with "
+                             "the array engine")
+    parser.add_argument("--trie", action="store_true",
+                        help="keep the paths in a prefix trie, slower but shared "
+                             "prefixes are only kept once")
+    parser.add_argument("--quiet", action="store_true",
+                        help="only write the .dot files, don't print them")
+    parser.add_argument("--workers", type=int,
+                        help="number of processes to read the input with (default 1), "
+                             "only worth it for big inputs on a machine with spare cores")
+    parser.add_argument("--shard", action="append", default=[], metavar="FILE",
+                        help="another file to heapify along with file, as if they were "
+                             "concatenated (can be given more than once), only with the "
+                             "array engine")
+    parser.add_argument("--merge", action="store_true",
+                        help="sort file and every shard in their own process (one per "
+                             "core unless --workers says otherwise) and k-way merge them "
+                             "into <label>Sorted.txt")
+    parser.add_argument("--key", default="length", choices=KEYS,
+                        help="order paths by their length (default) or the sum of their tokens")
+    parser.add_argument("--tie-break", action="store_true",
+                        help="order paths with equal keys by their text")
+    parser.add_argument("--max", action="store_true",
+                        help="build a max heap, the biggest key on top")
+    parser.add_argument("--stats", action="store_true",
+                        help="time each phase, count operations and write <label>Stats.json")
+    parser.add_argument("--profile", action="store_true",
+                        help="also run cProfile and write <label>Stats.prof (implies --stats)")
+    parser.add_argument("--top", type=int, metavar="K",
+                        help="stream the file and only write its K shortest paths, "
+                             "shortest first, to <label>Top.txt")
+    parser.add_argument("--memory", type=int, metavar="MB",
+                        help="for listings bigger than memory: keep at most about MB "
+                             "megabytes of paths in memory, spill the rest to sorted "
+                             "temporary runs and write every path in heap order to "
+                             "<label>Sorted.txt")
+    parser.add_argument("--spill-dir", metavar="DIR",
+                        help="where --memory puts its runs, the system's temporary "
+                             "directory by default")
+    parser.add_argument("--levels", type=int, metavar="N",
+                        help="only print the top N levels of the tree in the .dot files")
+    parser.add_argument("--subtree", type=int, metavar="I",
+                        help="only print the subtree under the node numbered I in a "
+                             "whole .dot file")
+    parser.add_argument("--summaries", action="store_true",
+                        help="with --levels, show what is under the last level as summary "
+                             "nodes with their number of nodes and shortest path")
+    parser.add_argument("--exact-summaries", action="store_true",
+                        help="like --summaries but walk the hidden nodes for exact counts "
+                             "and the longest path too")
+    parser.add_argument("--snapshot", metavar="FILE",
+                        help="reuse the heap saved in FILE if it was saved from the same "
+                             "unchanged input, otherwise heapify and save it there")
+    return parser.parse_args(argv)
+
+def write_top(input_files, label, k, echo, priority=None):
+    """
+    Writes the k shortest paths of the input files to <label>Top.txt, one per line
+    in the same format as the input, and prints them too if echo is on.
+
+    Args:
+        input_files (list): The files to read from, in order
+        label (str): The label to give to the output file
+        k (int): The number of paths to keep
+        echo (bool): Whether to print the paths as well
+        priority (Priority): Optional, what to order the paths by
+    """
+    paths = itertools.chain.from_iterable(map(PathReader.iter_paths, input_files))
+    lines = [node.line.decode() + "\n" for node in TopK.top_k(paths, k, priority)]
+    with open(label + "Top.txt", "w") as file:
+        file.writelines(lines)
+    if echo:
+        print("".join(lines), end="")
+
+def write_merged(input_files, label, echo, priority=None, workers=None):
+    """
+    Writes every path of the input files to <label>Sorted.txt in order, shortest
+    first, sorting each file in its own process and merging them. Prints them too
+    if echo is on.
+
+    Args:
+        input_files (list): The files to read from, in order
+        label (str): The label to give to the output file
+        echo (bool): Whether to print the paths as well
+        priority (Priority): Optional, what to order the paths by
+        workers (int): Optional, the number of processes to sort with, one per core
+                       if None
+    """
+    with open(label + "Sorted.txt", "wb") as file:
+        for path in merge_shards(input_files, priority, workers):
+            file.write(path + b"\n")
+            if echo:
+                print(path.decode())
+
+def write_sorted(input_files, label, memory, echo, priority=None, temp_dir=None):
+    """
+    Writes every path of the input files to <label>Sorted.txt in heap order,
+    shortest first, keeping about memory bytes of paths in memory at a time.
+    Prints them too if echo is on.
+
+    Args:
+        input_files (list): The files to read from, in order
+        label (str): The label to give to the output file
+        memory (int): About how many bytes of paths to keep in memory
+        echo (bool): Whether to print the paths as well
+        priority (Priority): Optional, what to order the paths by
+        temp_dir (str): Optional, where to put the runs
+    """
+    with ExternalHeap(memory, priority, temp_dir) as heap, open(label + "Sorted.txt", "wb") as file:
+        for input_file in input_files:
+            heap.load(input_file)
+        for node in heap.pop_all():
+            file.write(node.line + b"\n")
+            if echo:
+                print(node.line.decode())
 
 def main():
     """
@@ -15,18 +162,55 @@ def main():
     appropriate command line arguments and call its go method. Will handle improper
     usage of command line arguments.
     """
+    args = parse_args()
 
-    # check that the appropriate number of command lines are entered
-    if len(sys.argv) != 3:
-        print("\nERROR! usage: python3 Driver.py <file> <label>\n")
-        return
-
-    # start the heap go function
-    heap = Heap(sys.argv[1], sys.argv[2])
+    input_files = [args.file] + args.shard
+    priority = Priority(args.key, args.tie_break, args.max)
+    options = {"echo": not args.quiet, "priority": priority, "arity": args.arity,
+               "trie": args.trie}
+    if args.stats or args.profile:
+        options["stats"] = Stats(profile=args.profile)
 
     # handle bad file input/input with empty path
     try:
+        # the top k mode never builds the whole heap
+        if args.top is not None:
+            write_top(input_files, args.label, args.top, not args.quiet, priority)
+            return
+
+        # the external mode only keeps part of the paths in memory
+        if args.memory is not None:
+            if args.memory < 1:
+                raise ValueError("\nError! --memory has to be at least 1 MB.\n")
+            write_sorted(input_files, args.label, args.memory << 20, not args.quiet,
+                         priority, args.spill_dir)
+            return
+
+        # every file is sorted on its own and the sorted files are merged
+        if args.merge:
+            write_merged(input_files, args.label, not args.quiet, priority, args.workers)
+            return
+
+        if args.shard and args.engine != "array":
+            raise ValueError("\nError! --shard only works with the array engine.\n")
+
+        # a snapshot of the same unchanged files ordered the same way is already
+        # heapified, so only the after file is made
+        if args.snapshot and Snapshot.is_fresh(args.snapshot, input_files, priority, args.arity):
+            heap = ArrayHeap.load_snapshot(args.snapshot, args.label, **options)
+            heap.set_render(args.levels, args.subtree, args.summaries, args.exact_summaries)
+            heap.write_dot(args.label + "After.dot", heap.root, False)
+            return
+
+        # start the heap go function, shards are read by a pool of workers if asked to
+        if args.shard:
+            heap = ShardedHeap(input_files, args.label, workers=args.workers or 1, **options)
+        else:
+            heap = ENGINES[args.engine](args.file, args.label, workers=args.workers or 1, **options)
+        heap.set_render(args.levels, args.subtree, args.summaries, args.exact_summaries)
         heap.go()
+        if args.snapshot:
+            heap.save_snapshot(args.snapshot)
     except FileNotFoundError:
         print("\nERROR! File not found, please enter valid file or path.\n")
     except ValueError as error:
@@ -34,4 +218,4 @@ def main():
 
 # call main function
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
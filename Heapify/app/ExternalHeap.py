@@ -0,0 +1,295 @@
+"""
+This file contains a heap for listings that don't fit in memory. Paths are kept
+in an in memory ArrayHeap until it uses more than the memory budget, then the
+whole in memory heap is sorted and spilled to a temporary run file. Popping
+merges the runs lazily: only the first path of each run is held (along with a
+small read buffer per run), next to the top of the in memory heap, so popping
+the whole heapified order or just the k shortest paths of a listing of any size
+uses about the budget and no more.
+
+The read buffers come out of the budget too, which sets how many runs can be
+read at once (the fan in). Runs are only opened once popping starts, and when
+there are more runs than the fan in the runs that were merged the fewest times
+are merged into one, in as many passes as it takes, so a huge listing never
+has more than the fan in of files open.
+"""
+
+from ArrayHeap import ArrayHeap
+import PathReader
+import heapq
+import itertools
+import os
+import tempfile
+
+# about how many bytes a node takes besides its path (see PathNode)
+NODE_BYTES = 160
+# the read buffer of every run file
+RUN_BUFFER = 1 << 16
+# the most runs read at once whatever the budget, well under the usual open file limit
+MAX_FAN_IN = 128
+
+class ExternalHeap():
+    """
+    ExternalHeap class is a min heap that spills sorted runs to disk to stay
+    under a memory budget. It can be used as a context manager that deletes the
+    runs at the end.
+    """
+
+    def __init__(self, memory=1 << 28, priority=None, temp_dir=None):
+        """
+        Creates an empty external heap.
+
+        Args:
+            memory (int): Optional, about how many bytes the paths in memory and the
+                          read buffers of the runs can take
+            priority (Priority): Optional, what to order the paths by, path length if None
+            temp_dir (str): Optional, where to put the run files, the system's temporary
+                            directory if None
+
+        raise:
+            ValueError if memory is less than 1
+        """
+        if memory < 1:
+            raise ValueError("\nError! The memory budget has to be at least 1 byte.\n")
+        # about a quarter of the budget goes to the read buffers of the runs
+        self.fan_in = max(2, min(MAX_FAN_IN, memory // (4 * RUN_BUFFER)))
+        self.memory = max(memory - self.fan_in * RUN_BUFFER, memory // 2)
+        self.heap = ArrayHeap(None, "external", echo=False, priority=priority)
+        self.used = 0
+        self.directory = tempfile.TemporaryDirectory(prefix="heapify-runs-", dir=temp_dir)
+        self.run_count = 0
+        # (times merged, file name) of the runs that aren't being read yet
+        self.runs = []
+        # (priority, run number, node, run file) for the first path left in each run being read
+        self.heads = []
+        self.size = 0
+
+    def __len__(self):
+        """
+        Gives the number of paths in the heap, on disk and in memory
+
+        Return:
+            int: The number of paths
+        """
+        return self.size
+
+    def __enter__(self):
+        """
+        Uses the heap as a context manager.
+
+        Return:
+            ExternalHeap: This heap
+        """
+        return self
+
+    def __exit__(self, *error):
+        """
+        Deletes the run files when the with block ends.
+        """
+        self.close()
+
+    def load(self, input_file):
+        """
+        Adds every path of a file, read lazily one chunk at a time. The chunks are
+        kept small next to the budget and the paths are only heapified once the
+        whole file has been read.
+
+        Args:
+            input_file (str): The file to read
+
+        Return:
+            int: The number of paths added
+
+        raise:
+            ValueError if the file contains a node with an empty path
+        """
+        heap = self.heap
+        heap.own_nodes()
+        added = 0
+        chunk_size = min(PathReader.CHUNK_SIZE, max(self.memory // 8, 1 << 16))
+        for path in PathReader.iter_paths(input_file, chunk_size):
+            node = heap.make_node(path)
+            node.position = len(heap.nodes)
+            heap.nodes.append(node)
+            self.used += NODE_BYTES + len(path)
+            added += 1
+            if self.used > self.memory:
+                self.spill()
+        self.size += added
+        if len(heap.nodes) > 1:
+            heap.root = 1
+            heap.heapify(1)
+        return added
+
+    def push(self, path):
+        """
+        Adds a path to the heap.
+
+        Args:
+            path (bytes, str or list): The path to add, anything PathNode takes
+        """
+        node = self.heap.push(path)
+        self.used += NODE_BYTES + len(node.line)
+        self.size += 1
+        if self.used > self.memory:
+            self.spill()
+
+    def spill(self):
+        """
+        Sorts the in memory paths and writes them to a new run file, leaving the
+        in memory heap empty.
+        """
+        heap = self.heap
+        nodes = heap.nodes[1:]
+        nodes.sort(key=lambda node: node.priority)
+        self.runs.append((0, self.write_run(nodes)))
+
+        heap.nodes = [None]
+        heap.root = None
+        self.used = 0
+        self.limit_runs()
+
+    def write_run(self, nodes):
+        """
+        Writes sorted nodes to a new run file.
+
+        Args:
+            nodes (iterable): The nodes, shortest first
+
+        Return:
+            str: The name of the run file
+        """
+        name = os.path.join(self.directory.name, "run" + str(self.run_count) + ".txt")
+        self.run_count += 1
+        with open(name, "wb") as file:
+            batch = []
+            for node in nodes:
+                batch.append(node.line + b"\n")
+                if len(batch) == 4096:
+                    file.write(b"".join(batch))
+                    batch = []
+            file.write(b"".join(batch))
+        return name
+
+    def read_run(self, file):
+        """
+        Reads the rest of a run.
+
+        Args:
+            file (file): The open run file, closed at the end
+
+        Yields:
+            PathNode: The next node of the run
+        """
+        with file:
+            for line in file:
+                yield self.heap.make_node(line[:-1])
+
+    def limit_runs(self):
+        """
+        Merges runs until no more than the fan in of them would be read at
+        once. The runs merged the fewest times are merged first, so every path
+        is only rewritten about log(runs) / log(fan in) times.
+        """
+        while len(self.runs) + len(self.heads) > self.fan_in:
+            if len(self.runs) > 1:
+                # the sort is stable so older runs go first among equals
+                self.runs.sort(key=lambda run: run[0])
+                merging, self.runs = self.runs[:self.fan_in], self.runs[self.fan_in:]
+                sources = [self.read_run(open(name, "rb", buffering=RUN_BUFFER))
+                           for level, name in merging]
+                level = max(level for level, name in merging) + 1
+            else:
+                # the runs being read are merged with what they have left
+                sources = [itertools.chain([node], self.read_run(file))
+                           for priority, run, node, file in self.heads]
+                sources += [self.read_run(open(name, "rb", buffering=RUN_BUFFER))
+                            for level, name in self.runs]
+                merging = self.runs
+                self.heads, self.runs = [], []
+                level = 0
+            merged = self.write_run(heapq.merge(*sources, key=lambda node: node.priority))
+            for old_level, name in merging:
+                os.remove(name)
+            self.runs.append((level, merged))
+
+    def open_runs(self):
+        """
+        Starts reading every run that is waiting by putting its first path with
+        the other heads.
+        """
+        for level, name in self.runs:
+            self.run_count += 1
+            self.next_head(self.run_count, open(name, "rb", buffering=RUN_BUFFER))
+        self.runs = []
+
+    def next_head(self, run, file):
+        """
+        Reads the next path of a run into the heads, or closes the run if it is
+        done.
+
+        Args:
+            run (int): The number of the run, which keeps equal paths in run order
+            file (file): The open run file
+        """
+        line = file.readline()
+        if line:
+            node = self.heap.make_node(line[:-1])
+            heapq.heappush(self.heads, (node.priority, run, node, file))
+        else:
+            file.close()
+
+    def peek(self):
+        """
+        Gives the node with the shortest path without taking it out.
+
+        Return:
+            PathNode: The shortest path
+
+        raise:
+            IndexError if the heap is empty
+        """
+        self.open_runs()
+        if self.heads and (not len(self.heap) or self.heads[0][2] < self.heap.peek()):
+            return self.heads[0][2]
+        return self.heap.peek()
+
+    def pop(self):
+        """
+        Takes the node with the shortest path out of the heap.
+
+        Return:
+            PathNode: The shortest path
+
+        raise:
+            IndexError if the heap is empty
+        """
+        self.open_runs()
+        if self.heads and (not len(self.heap) or self.heads[0][2] < self.heap.peek()):
+            priority, run, node, file = heapq.heappop(self.heads)
+            self.next_head(run, file)
+        else:
+            node = self.heap.pop()
+            self.used -= NODE_BYTES + len(node.line)
+        self.size -= 1
+        return node
+
+    def pop_all(self):
+        """
+        Pops every path in order, shortest first.
+
+        Yields:
+            PathNode: The next shortest path
+        """
+        while self.size:
+            yield self.pop()
+
+    def close(self):
+        """
+        Closes and deletes every run file.
+        """
+        for priority, run, node, file in self.heads:
+            file.close()
+        self.heads = []
+        self.runs = []
+        self.directory.cleanup()
@@ -12,7 +12,21 @@ viewed as a .png file using graphviz.
 """
 
 # import PathNode so the Nodes can be created from the input command line arg.
-from PathNode import PathNode
+from PathNode import PathNode, CountingPathNode, TriePathNode, CountingTriePathNode
+from PathTrie import PathTrie, TrieLine
+from collections import deque
+from contextlib import nullcontext
+import PathReader
+import Priority
+import Snapshot
+import sys
+
+# .dot lines are joined into chunks of this many lines before being written
+DOT_CHUNK_LINES = 4096
+# size of the write buffer for the .dot files
+DOT_BUFFER_SIZE = 1 << 20
+# what phase gives back when the heap isn't instrumented
+NO_PHASE = nullcontext()
 
 class Heap():
     """
@@ -22,7 +36,12 @@ class Heap():
     allows the driver to create .dot files to be viewed as a .png in graphviz.
     """
 
-    def __init__(self, input_file, label):
+    # the numbers of children a node can have, None if any number from 2 up works
+    # the pointer tree only has left and right children
+    ARITIES = (2,)
+
+    def __init__(self, input_file, label, debug=False, echo=True, workers=1, stats=None,
+                 priority=None, arity=2, trie=False):
         """
         Creates a heap opject with an input file, list to hold its contents, root, label,
         and message for printing. root and message are initialize to None at first.
@@ -30,18 +49,48 @@ class Heap():
         args:
             input_file (str): the file to create nodes from (command line argument)
             label (str): the label to give to the .dot files (command line argument)
+            debug (bool): Optional, check the result with is_heap after heapifying
+            echo (bool): Optional, also print the .dot files to stdout
+            workers (int): Optional, the number of processes to read the input with
+            stats (Stats): Optional, record phase times and operation counts in stats
+            priority (Priority): Optional, what to order the paths by, path length if None
+            arity (int): Optional, the number of children each node can have
+            trie (bool): Optional, intern the paths in a prefix trie as they are read
+                         so shared prefixes are only kept once
+
+        raise:
+            ValueError if the engine can't build a tree with that many children
         """
+        if arity < 2 or (self.ARITIES and arity not in self.ARITIES):
+            raise ValueError("\nError! The " + type(self).__name__ + " engine can't make a "
+                             + str(arity) + "-ary heap.\n")
+        self.arity = arity
         # start at 0 to make creating the nodes easier
         self.temp_path = [0]
         self.input_file = input_file
         self.root = None
         self.label = label
         self.msg = None
+        self.debug = debug
+        self.echo = echo
+        self.workers = workers
+        self.stats = stats
+        # instrumented heaps use nodes that count their comparisons
+        self.trie = PathTrie() if trie else None
+        if trie:
+            self.node_type = CountingTriePathNode if stats else TriePathNode
+        else:
+            self.node_type = CountingPathNode if stats else PathNode
+        # the plain path length is already worked out by PathNode
+        self.priority = None if priority is None or priority.is_default() else priority
+        # what the .dot files show, the whole tree unless set_render says otherwise
+        self.render_options = {"levels": None, "subtree": None, "summaries": False, "exact": False}
 
     def read_paths(self, input_file):
         """
         Reads the contents of the files as paths for the PathNodes by adding each line
-        of the file to the temp_path attribute. 
+        of the file to the temp_path attribute. The file is memory mapped and parsed
+        in large chunks by PathReader, using workers processes if there is more than one.
 
         args:
             input_file (str): The file to read from
@@ -49,21 +98,53 @@ class Heap():
         raise:
             ValueError if an input contains a node with an empty path
         """
-        with open(input_file) as file:
-            # iterate through the lines of the file
-            for line in file:
-                line = line.strip().split()
-                # If we're given a node with an empty path 
-                if(line == ["0"]):
-                    raise ValueError("\nError! Input can't contain node with empty path.\n")
-                # add the acceptable line to temp_path
-                self.temp_path.append(line)
+        if self.workers <= 1:
+            self.add_paths(PathReader.iter_paths(input_file))
+        else:
+            self.add_paths(PathReader.read_paths(input_file, self.workers))
+        if self.trie is not None:
+            self.trie.compact()
+
+    def add_paths(self, paths):
+        """
+        Adds paths to temp_path, as trie leaves if the heap keeps its paths in a
+        trie so the lines themselves are never all held at once.
+
+        args:
+            paths (iterable): The single spaced paths to add
+        """
+        if self.trie is not None:
+            paths = map(self.trie.add, paths)
+        self.temp_path.extend(paths)
+
+    def make_node(self, path, parent=None):
+        """
+        Makes a node for a path with the heap's priority worked out once and cached.
+
+        args:
+            path (bytes, str, list or int): The path for the node, or its trie leaf
+            parent (PathNode): Optional, the parent of the node
+
+        returns:
+            PathNode: The new node
+        """
+        if self.trie is None:
+            node = self.node_type(path, parent)
+        else:
+            node = self.node_type(path, parent, self.trie)
+        if self.priority:
+            node.priority = self.priority(node.line)
+            # a trie node breaks ties with a key that doesn't hold a copy of the line
+            if self.trie is not None and self.priority.tie_break:
+                node.priority = (node.priority[0], TrieLine(self.trie, node.leaf))
+        return node
 
     def build_complete_tree(self, index, parent=None):
         """
         Takes the paths in temp_path and creates PathNodes from them. Also creates a
         complete binary tree from the nodes in the order of which they are created.
-        Nodes are added left to right recursively.
+        Nodes are added left to right, level by level, with a queue instead of
+        recursion so very large inputs don't run out of stack.
 
         args:
             index (int): The index for temp_path to get the value we want
@@ -73,110 +154,458 @@ class Heap():
         returns:
             path_node (PathNode): the PathNode createc.
         """
-        path_node = None
-        
-        # keep the index inbounds for recursive calls
-        if index < len(self.temp_path):
+        # keep the index inbounds
+        if index >= len(self.temp_path):
+            return None
+
+        # make the top node with the appropriate parent, None if root
+        path_node = self.make_node(self.temp_path[index], parent)
+        last = len(self.temp_path) - 1
 
-            # make a node with the appropriate parent, None if root
-            path_node = PathNode(self.temp_path[index], parent)
+        # nodes waiting for their children along with their index in temp_path
+        waiting = deque([(index, path_node)])
+        while waiting:
+            position, node = waiting.popleft()
 
             # set the root of the tree and set the last node of the tree
-            if index == 1: self.root = path_node
-            if index == len(self.temp_path) - 1: path_node.is_last_node = True 
+            if position == 1: self.root = node
+            if position == last: node.is_last_node = True
 
             # make the left/right nodes of the current node in the tree
-            path_node.left = self.build_complete_tree(2 * index, path_node)
-            path_node.right = self.build_complete_tree(2 * index + 1, path_node)
-        
+            if 2 * position <= last:
+                node.left = self.make_node(self.temp_path[2 * position], node)
+                waiting.append((2 * position, node.left))
+            if 2 * position + 1 <= last:
+                node.right = self.make_node(self.temp_path[2 * position + 1], node)
+                waiting.append((2 * position + 1, node.right))
+
         return path_node
 
     def set_level_end(self, root):
         """
-        Sets the nodes that end the level for the binary tree recursively.
+        Sets the nodes that end the level for the binary tree, the last node
+        level_order gives for every level (so a half full bottom level ends at
+        the last node, not below the right most node).
 
         Args:
             root (PathNode): The node that we are currently at.
         """
-        if root:
-            # set level end and move to only right nodes recursively
-            root.is_level_end = True 
-            self.set_level_end(root.right)
+        previous_level, previous = None, None
+        for level, index, node in self.level_order(root):
+            # the node before the first one of a level ended the level above
+            if previous and level != previous_level:
+                previous.is_level_end = True
+            previous_level, previous = level, node
+        if previous:
+            previous.is_level_end = True
 
     def set_generation_links(self, root):
         """
         Sets the generation links for the nodes in the tree (generation_right)
         by connecting roots with 2 children and connecting the right childs
-        generation right to the left child of the roots generation right node
+        generation right to the left child of the roots generation right node.
+        Nothing in the heap uses the links anymore (level_order walks the tree
+        without them) so go doesn't set them, they are only for callers that
+        want to walk a level themselves.
 
         args:
             root (PathNode): The PathNode we are currently at. 
         """
-        if root and root.left and root.right:
+        # parents are always linked before their children are popped
+        stack = [root]
+        relinked = 0
+        while stack:
+            root = stack.pop()
+            if root and root.left and root.right:
+                relinked += 2
 
-            # connect nodes that dont share a parent
-            if root.right and root.generation_right:
-                root.right.generation_right = root.generation_right.left
+                # connect nodes that dont share a parent
+                if root.right and root.generation_right:
+                    root.right.generation_right = root.generation_right.left
 
-            # connect children that share a parent
-            root.left.generation_right = root.right
+                # connect children that share a parent
+                root.left.generation_right = root.right
 
-            # traverse the rest of the tree
-            self.set_generation_links(root.left)
-            self.set_generation_links(root.right)
+                # traverse the rest of the tree
+                stack.append(root.right)
+                stack.append(root.left)
+
+        if self.stats:
+            self.stats.count("nodes_relinked", relinked)
 
     def print_tree_levels(self, root, before):
         """
-        Creates the tree levels in the format to be put into the .dot files for graphviz
-        does this level by level and uses the helper method print_tree_level
-        to do so.
+        Creates the whole .dot document for graphviz in msg. go streams the document
+        to the file with write_dot instead, this is for callers that want the text.
 
         Args:
             root (PathNode): The PathNode we are currently at.
-            before (int): Our index for print tree levels (node "index")
+            before (bool): True for the before document, False for the after document
+        """
+        self.msg = "".join(self.dot_lines(self.render_root(root), before))
+
+    def render_root(self, root):
+        """
+        Gives the root of what the .dot files show, the subtree set_render
+        picked if there is one.
+
+        Args:
+            root (PathNode): The root of the whole tree
+
+        Return:
+            PathNode: The root to print from
+
+        raise:
+            ValueError if set_render picked a subtree the tree doesn't have
+        """
+        subtree = self.render_options["subtree"]
+        if subtree is None or root is None:
+            return root
+        return self.subtree_root(root, subtree)
+
+    def set_render(self, levels=None, subtree=None, summaries=False, exact=False):
+        """
+        Picks what the .dot files show, for heaps too big to print whole. Only
+        the nodes that are printed (and the children of the last printed level
+        when summarizing) are visited, so the cost depends on the size of the
+        document and not the size of the heap.
+
+        Args:
+            levels (int): Optional, only print this many levels, all of them if None
+            subtree (int): Optional, only print the subtree under the node with this
+                           number (the numbers the whole tree is printed with)
+            summaries (bool): Optional, put a summary node with the number of nodes
+                              and the shortest or longest path under every node with
+                              children on the last printed level, needs levels
+            exact (bool): Optional, walk the summarized nodes to give the exact
+                          number of nodes and shortest and longest paths, this
+                          visits the whole tree under the printed levels
+
+        raise:
+            ValueError if levels is less than 1 or subtree is negative
+        """
+        if levels is not None and levels < 1:
+            raise ValueError("\nError! At least 1 level has to be printed.\n")
+        if subtree is not None and subtree < 0:
+            raise ValueError("\nError! The heap has no node " + str(subtree) + ".\n")
+        self.render_options = {"levels": levels, "subtree": subtree,
+                               "summaries": summaries or exact, "exact": exact}
+
+    def dot_lines(self, root, before):
+        """
+        Generates the .dot document for graphviz one line at a time, first the
+        header, then a line for every node level by level, then the paths
+        between the nodes and last the closing bracket. When set_render limits
+        the levels each path is printed right after the node it goes to.
+
+        Args:
+            root (PathNode): The root of the tree to print
+            before (bool): True for the before document, False for the after document
+
+        Yields:
+            str: The next line of the document
         """
-        index = 0
-        # Reseting the msg to get the current tree
         if before:
-            self.msg = "digraph " + self.label + "Before{\n"
+            yield "digraph " + self.label + "Before{\n"
         else:
-            self.msg = "digraph " + self.label + "After{\n"
-        # Traverse all nodes with a level
-        while root.left:
-            index = self.print_tree_level(root, index)
-            root = root.left
-        # account for last level
-        index = self.print_tree_level(root, index)
-        self.print_paths(0, 1, index - 1)
+            yield "digraph " + self.label + "After{\n"
+
+        options = self.render_options
+        if options["levels"] is not None:
+            yield from self.limited_lines(root, options["levels"], options["summaries"],
+                                          options["exact"], not before)
+        else:
+            # number the nodes in the order they are printed
+            count = 0
+            for level, index, node in self.level_order(root):
+                yield '\t' + str(index) + '[label=' + node.__str__() + '];\n'
+                count = index + 1
+
+            yield from self.edge_lines(root, count)
         # add closing bracket to the very end
-        self.msg += '}'
-        
-    def print_tree_level(self, node, index):
+        yield '}'
+
+    def limited_lines(self, root, levels, summaries, exact, heapified):
+        """
+        Generates the nodes of the top levels of the tree and the paths to them,
+        numbered level by level like a whole tree. The children of the last
+        level are only looked at when they are summarized.
+
+        Args:
+            root (PathNode): The root of the tree to print
+            levels (int): The number of levels to print
+            summaries (bool): Whether to summarize what is under the last level
+            exact (bool): Whether the summaries walk the nodes they summarize
+            heapified (bool): Whether the tree is a heap yet
+
+        Yields:
+            str: The next line of the document
+        """
+        # (number of the parent, the node) for every node of the level
+        current = [(None, root)] if root is not None else []
+        number = 0
+        for level in range(levels):
+            below = []
+            last = level == levels - 1
+            for parent, handle in current:
+                yield '\t' + str(number) + '[label=' + self.node_at(handle).__str__() + '];\n'
+                if parent is not None:
+                    yield "\t" + str(parent) + " -> " + str(number) + ";\n"
+                if not last or summaries:
+                    below.extend((number, child) for child in self.children(handle))
+                number += 1
+            current = below
+
+        # every node on the last level gets one summary of all of its children
+        start = 0
+        while start < len(current):
+            parent = current[start][0]
+            end = start
+            while end < len(current) and current[end][0] == parent:
+                end += 1
+            handles = [handle for _, handle in current[start:end]]
+            label = self.summary_label(handles, exact, heapified)
+            yield '\t' + str(number) + '[label="' + label + '", shape=box, style=dashed];\n'
+            yield "\t" + str(parent) + " -> " + str(number) + " [style=dashed];\n"
+            number += 1
+            start = end
+
+    def summary_label(self, handles, exact, heapified):
+        """
+        Describes the nodes under some subtrees for a summary node, the number of
+        nodes and the shortest and longest path (in hops, like the node labels).
+        Without exact the number comes from the shape of the tree when it can,
+        and once the tree is heapified the shortest (or, for a max heap, the
+        longest) path by length is the top of one of the subtrees, so only the
+        tops are looked at.
+
+        Args:
+            handles (list): The roots of the subtrees
+            exact (bool): Whether to walk every node of the subtrees
+            heapified (bool): Whether the tree is a heap yet
+
+        Return:
+            str: The label, like "30 more, 2 to 7 hops"
+        """
+        if exact:
+            count, shortest, longest = 0, None, None
+            for handle in handles:
+                for level, index, node in self.level_order(handle):
+                    hops = node.line.count(b" ")
+                    count += 1
+                    shortest = hops if shortest is None else min(shortest, hops)
+                    longest = hops if longest is None else max(longest, hops)
+        else:
+            sizes = [self.subtree_size(handle) for handle in handles]
+            count = None if None in sizes else sum(sizes)
+            shortest, longest = None, None
+            # a heap ordered by length has its shortest (or longest) path on top
+            if heapified and (self.priority is None or self.priority.key is Priority.length):
+                tops = [self.node_at(handle).line.count(b" ") for handle in handles]
+                if self.priority is not None and self.priority.max_heap:
+                    longest = max(tops)
+                else:
+                    shortest = min(tops)
+
+        label = "more" if count is None else str(count) + " more"
+        if shortest is not None and longest is not None:
+            return label + ", " + str(shortest) + " to " + str(longest) + " hops"
+        if shortest is not None:
+            return label + ", " + str(shortest) + "+ hops"
+        if longest is not None:
+            return label + ", up to " + str(longest) + " hops"
+        return label
+
+    def children(self, root):
+        """
+        Gives the children of a node, left to right
+
+        Args:
+            root (PathNode): The node we are currently at
+
+        Return:
+            list: The children, empty for a leaf
+        """
+        return [child for child in (root.left, root.right) if child]
+
+    def node_at(self, root):
         """
-        Makes the message for the graphviz .dot file of a single level in the tree
+        Gives the node for what the tree walking methods take as a root, which
+        for the pointer tree is the node itself.
 
         Args:
-            node (PathNode): The node we are currently at
-            index (int): The "index" of the node we are currently at (what number it is)
+            root (PathNode): The node we are currently at
 
         Return:
-            index (int): The new index we are at after traversing the level and incrementing it
-        """
-        # traverse all nodes in level
-        while node.generation_right:
-            # add node in format and move to next
-            self.msg += '\t' + str(index) + '[label=' + node.__str__() + '];\n'
-            node = node.generation_right
-            index += 1
-        # account for last level
-        self.msg += '\t' + str(index) + '[label=' + node.__str__() + '];\n' 
-        index += 1
-        return index
+            PathNode: The node
+        """
+        return root
+
+    def subtree_root(self, root, number):
+        """
+        Finds the node with a number in the level order numbering under root
+        (the numbers the .dot files give the nodes). The tree is complete, so
+        the bits of number + 1 after the first one are the way down, 0 for left
+        and 1 for right.
+
+        Args:
+            root (PathNode): The root of the tree
+            number (int): The number of the node, root is 0
+
+        Return:
+            PathNode: The node
+
+        raise:
+            ValueError if the tree doesn't have that many nodes
+        """
+        position = number + 1
+        for bit in range(position.bit_length() - 2, -1, -1):
+            if root is None:
+                break
+            root = root.right if position >> bit & 1 else root.left
+        if root is None:
+            raise ValueError("\nError! The heap has no node " + str(number) + ".\n")
+        return root
+
+    def subtree_size(self, root):
+        """
+        Counts the nodes under and including root without visiting them. In a
+        complete tree either the left subtree is perfect (when the left most
+        paths of both subtrees are as deep) or the right one is one level less
+        deep and perfect, so only one side has to be counted at every level.
+
+        Args:
+            root (PathNode): The root of the subtree
+
+        Return:
+            int: The number of nodes
+        """
+        size = 0
+        while root:
+            left_depth = self.left_depth(root.left)
+            right_depth = self.left_depth(root.right)
+            if left_depth == right_depth:
+                # the root and the perfect left subtree
+                size += 1 << left_depth
+                root = root.right
+            else:
+                size += 1 << right_depth
+                root = root.left
+        return size
+
+    def left_depth(self, root):
+        """
+        Gives the number of nodes on the left most path down from root
+
+        Args:
+            root (PathNode): The node to start at, can be None
+
+        Return:
+            int: The number of nodes
+        """
+        depth = 0
+        while root:
+            depth += 1
+            root = root.left
+        return depth
+
+    def edge_lines(self, root, count):
+        """
+        Generates the paths between the nodes numbered by dot_lines. In a complete
+        tree they only depend on the number of nodes.
+
+        Args:
+            root (PathNode): The root of the tree to print
+            count (int): The number of nodes printed
+
+        Yields:
+            str: The line for the next path
+        """
+        yield from self.print_paths(0, 1, count - 1)
+
+    def level_order(self, root):
+        """
+        Generates the nodes of the tree level by level, left to right, along with
+        their level and their number in that order. Nothing is held besides the
+        node it is at: the next node of a level is found through the parent
+        pointers (see next_on_level), so the order is right even while the
+        generation links are out of date.
+
+        Args:
+            root (PathNode): The root of the tree
+
+        Yields:
+            tuple: The (level, index, node) of the next node, the root is level 0
+                   and index 0
+        """
+        if root is None:
+            return
+        yield 0, 0, root
+        level = 1
+        index = 1
+        # the first node of every level is the leftmost one below the root
+        node = self.next_on_level(root, 0, level, root)
+        while node:
+            while node:
+                yield level, index, node
+                index += 1
+                node = self.next_on_level(node, level, level, root)
+            level += 1
+            node = self.next_on_level(root, 0, level, root)
+
+    def next_on_level(self, node, depth, level, root):
+        """
+        Finds the next node level levels below root, left to right, after node.
+        It walks up to the first ancestor that has a right child it hasn't been
+        under yet, over to that child and back down its left side, and keeps
+        going like that when the left side doesn't reach the level (a half full
+        bottom level, or a subtree that isn't complete).
+
+        Args:
+            node (PathNode): The node to start from, its subtree is searched
+                             first if it is above the level
+            depth (int): How many levels node is below root
+            level (int): The level to find the next node on
+            root (PathNode): The root of the tree, the walk never goes above it
+
+        Return:
+            PathNode: The next node on the level, None if node was the last one
+        """
+        down = depth < level
+        while True:
+            # go down the left side (the right child if there is no left) to the level
+            while down and depth < level:
+                child = node.left or node.right
+                if child is None:
+                    break
+                node, depth = child, depth + 1
+            if down and depth == level:
+                return node
+
+            # go up to the first ancestor with a right child that hasn't been walked
+            while node is not root and (node.parent.right is None or node.parent.right is node):
+                node, depth = node.parent, depth - 1
+            if node is root:
+                return None
+            node = node.parent.right
+            down = True
+
+    def level_nodes(self, root):
+        """
+        Generates the nodes of the tree level by level, left to right.
+
+        Args:
+            root (PathNode): The root of the tree
+
+        Yields:
+            PathNode: The next node in level order
+        """
+        for level, index, node in self.level_order(root):
+            yield node
 
     def print_paths(self, index, next_node, stop_point):
         """
-        Adds the paths (pointers) of each node at the bottom of our .dot graphviz file
-        and adds the paths recursively
+        Generates the paths (pointers) of each node at the bottom of our .dot graphviz file
         ex. let 0 be the root and 1 its left and 2 its right,
         0 -> 1
         0 -> 2, etc.
@@ -185,41 +614,110 @@ class Heap():
             index (int): The number ordering of the node we are at
             next_node (int): The next node index
             stop_point (int): The node index to stop at
+
+        Yields:
+            str: The line for the next path
         """
         # stay in bounds of # of nodes
-        if next_node <= stop_point:
-            # determine left and right nodes
-            if next_node % 2 == 1:
-                self.msg = self.msg + "\t" + str(index) + " -> " + str(next_node) + ";\n"
-                self.print_paths(index, next_node + 1, stop_point)
-            elif next_node % 2 == 0:
-                self.msg = self.msg + "\t" + str(index) + " -> " + str(next_node) + ";\n"
-                self.print_paths(index + 1, next_node + 1, stop_point)
+        while next_node <= stop_point:
+            yield "\t" + str(index) + " -> " + str(next_node) + ";\n"
+            # every arity-th node is the last child, so move to the next parent
+            if next_node % self.arity == 0:
+                index += 1
+            next_node += 1
+
+    def write_dot(self, file_name, root, before):
+        """
+        Streams the .dot document into file_name in large chunks so only one chunk
+        of the document is ever held in memory. Each chunk is echoed to stdout too
+        when echo is on.
+
+        Args:
+            file_name (str): The .dot file to write
+            root (PathNode): The root of the tree to print
+            before (bool): True for the before document, False for the after document
+
+        raise:
+            ValueError if set_render picked a subtree the tree doesn't have
+        """
+        # a bad subtree is found before the file is made
+        root = self.render_root(root)
+        lines = []
+        with open(file_name, "w", buffering=DOT_BUFFER_SIZE) as file:
+            for line in self.dot_lines(root, before):
+                lines.append(line)
+                if len(lines) == DOT_CHUNK_LINES:
+                    self.write_chunk(file, lines)
+                    lines = []
+            self.write_chunk(file, lines)
+        if self.echo:
+            sys.stdout.write("\n")
+
+    def write_chunk(self, file, lines):
+        """
+        Writes a chunk of .dot lines to the file, and to stdout if echo is on.
+
+        Args:
+            file (file): The open .dot file
+            lines (list): The lines of the chunk
+        """
+        chunk = "".join(lines)
+        file.write(chunk)
+        if self.echo:
+            sys.stdout.write(chunk)
+
+    def save_snapshot(self, file_name):
+        """
+        Saves the tree in level order to a binary snapshot file that
+        ArrayHeap.load_snapshot can map back in without reading or heapifying.
+        The input file is recorded too, so Snapshot.is_fresh can tell if it changed.
+
+        Args:
+            file_name (str): The snapshot file to write
+        """
+        Snapshot.save(file_name, self.level_nodes(self.root), self.priority, self.arity,
+                      self.input_file)
 
     def heapify(self, root):
         """
-        Heapifys the complete binary tree by going to the last node with children,
-        swapping if necessary, moving to the preceding node, and repeating.
-        Makes a minheap, and traverses nodes recursively.
+        Heapifys the complete binary tree in a single bottom up pass (Floyd's build
+        heap). Starting at the last node with children and moving back to the root,
+        each node is sifted down until it is no bigger than its children.
+        Makes a minheap.
 
         args:
             root (PathNode): The PathNode to start at
         """
-        if root:
-            
-            # cannot heapify a leaf
-            if not self.leaf(root):
+        if root is None:
+            return
 
-                # get to left most node on the level of the last node with children
-                if root.left and not self.leaf(root.left):
-                    self.heapify(root.left)
+        # collect the nodes with children in level order, a sift only moves nodes
+        # inside the subtree being sifted so each node is still in its original
+        # spot when its turn comes
+        parents = [root]
+        for node in parents:
+            for child in (node.left, node.right):
+                if child and not self.leaf(child):
+                    parents.append(child)
 
-                # move right to the last node with children
-                if root.generation_right and not self.leaf(root.generation_right):
-                    self.heapify(root.generation_right)
-                
-                # see if a swap needs to be made and make it if it does
-                self.check_swap(root, root.left, root.right)
+        # sift from the last node with children back up to the root
+        for node in reversed(parents):
+            self.sift_down(node)
+
+        if self.stats:
+            self.stats.count("heapify_passes")
+
+    def sift_down(self, root):
+        """
+        Moves a node down the tree by swapping it with its smaller child until
+        neither child is smaller than it.
+
+        args:
+            root (PathNode): The PathNode to sift down
+        """
+        # the node keeps its identity while it moves, so keep checking its new children
+        while self.check_swap(root, root.left, root.right):
+            pass
 
     def check_swap(self, root, root_left, root_right):
         """
@@ -230,18 +728,23 @@ class Heap():
             root (PathNode): The node we are at
             root_left (PathNode): The left child from root (can be None)
             root_right (PathNode): The right child from root (can be None)
+
+        Return:
+            True if a swap was made, False otherwise
         """
         # check for swap if root has 2 children
         if root_left and root_right:
-            self.double_swap(root, root_left, root_right)
+            return self.double_swap(root, root_left, root_right)
 
         # check for a left swap if the leaf only has left child
         if root_left and not root_right:
-            self.left_swap(root, root_left)
+            return self.left_swap(root, root_left)
 
         # check for a right swap if the leaf only has right child
         if root_right and not root_left:
-            self.right_swap(root, root_right)
+            return self.right_swap(root, root_right)
+
+        return False
 
     def double_swap(self, root, root_left, root_right):
         """
@@ -253,18 +756,21 @@ class Heap():
             root (PathNode): The node we are at
             root_left (PathNode): The left child from root (can be None)
             root_right (PathNode): The right child from root (can be None)
+
+        Return:
+            True if a swap was made, False otherwise
         """
         # check for left swap if left child is smaller than right
         if root_left < root_right:
-            self.left_swap(root, root_left)
+            return self.left_swap(root, root_left)
 
         # check for right swap if right child is smaller than left
         elif root_left > root_right:
-            self.right_swap(root, root_right)
+            return self.right_swap(root, root_right)
 
         # check for left swap if both children are the same length
         else: 
-            self.left_swap(root, root_left)
+            return self.left_swap(root, root_left)
 
     def right_swap(self, root, root_right):
         """
@@ -274,6 +780,9 @@ class Heap():
         Args:
             root (PathNode): The node we are at
             root_right (PathNode): The right child from root (can be None)
+
+        Return:
+            True if the swap was made, False otherwise
         """
         # check if the child is smaller and not the same size of the root
         if root_right < root and (not root_right >= root): 
@@ -281,6 +790,10 @@ class Heap():
             # handle a change of root and make right swap
             if self.is_root(root): self.root = root_right
             root.swap_right(root_right)
+            if self.stats:
+                self.stats.count("swaps")
+            return True
+        return False
 
     def left_swap(self, root, root_left):
         """
@@ -290,6 +803,9 @@ class Heap():
         Args:
             root (PathNode): The node we are at
             root_left (PathNode): The left child from root (can be None)
+
+        Return:
+            True if the swap was made, False otherwise
         """
         # check if the child is smaller and not the same size of the root
         if root_left < root and (not root_left >= root): 
@@ -297,11 +813,15 @@ class Heap():
             # handle a change of root and make left swap
             if self.is_root(root): self.root = root_left
             root.swap_left(root_left)
+            if self.stats:
+                self.stats.count("swaps")
+            return True
+        return False
 
     def is_heap(self, root):
         """
         Checks if the tree is a complete heap by making sure no root has children
-        smaller than itself, traverses tree recursively.
+        smaller than itself, traverses tree with a stack.
 
         Args:
             root (PathNode): The node we are at
@@ -309,20 +829,24 @@ class Heap():
         Return:
             boolean: True if tree is a heap, False otherwise
         """
-        # check if the tree is a heap and needs to heapify again
-        if not self.leaf(root):
-            # if only left child
-            if root.left and not root.right:
-                return root <= root.left
-            # if left and right child
-            elif root.left and root.right:
-                # check root is smaller than children and traverse if it is
-                if root <= root.left and root <= root.right:
-                    return self.is_heap(root.left) and self.is_heap(root.right)
-                else:
-                    return False
-        else:
-            return True
+        stack = [root]
+        while stack:
+            root = stack.pop()
+            # check root is smaller than its children and traverse them if it is
+            for child in (root.left, root.right):
+                if child:
+                    if not root <= child:
+                        return False
+                    stack.append(child)
+        return True
+
+    def check_heap(self):
+        """
+        Asserts that the tree is still a heap when debugging, walking the whole
+        tree is too slow to do otherwise.
+        """
+        if self.debug and self.root is not None:
+            assert self.is_heap(self.root), "the tree is not a heap"
 
     def is_root(self, root):
         """
@@ -342,35 +866,63 @@ class Heap():
         """
         return root.left is None and root.right is None
 
+    def phase(self, name):
+        """
+        Gives a context manager that times the phase name when the heap is
+        instrumented and does nothing otherwise.
+
+        Args:
+            name (str): The name of the phase
+
+        Return:
+            The context manager to run the phase in
+        """
+        return self.stats.phase(name) if self.stats else NO_PHASE
+
     def go(self):
         """
         Acts a starting point for the Heap to be called in the driver, reads the file input,
         builds and sets binary tree, makes the before file for graphviz, heapifys,
-        and makes the after file for graphviz.
+        and makes the after file for graphviz. An instrumented heap also writes
+        <label>Stats.json.
+        """
+        if self.stats:
+            self.stats.start_profile()
+        try:
+            self.run_phases()
+        finally:
+            if self.stats:
+                self.stats.stop_profile()
+        if self.stats:
+            self.stats.write(self.label)
+
+    def run_phases(self):
+        """
+        Runs each phase of go, timing them if the heap is instrumented.
         """
         # read input
-        self.read_paths(self.input_file)
+        with self.phase("read"):
+            self.read_paths(self.input_file)
     
         # build tree
-        self.build_complete_tree(1)
-        self.set_level_end(self.root)
-        self.set_generation_links(self.root)
+        with self.phase("build"):
+            self.build_complete_tree(1)
+        with self.phase("link"):
+            self.set_level_end(self.root)
         
         # make the .dot file for graphviz (not heapified)
-        self.print_tree_levels(self.root, True)
-        with open(self.label + "Before.dot", "w") as file:
-            file.write(self.msg)
-        print(self.msg)
-        print()
-
-        #heapify
-        while not self.is_heap(self.root):
+        with self.phase("render_before"):
+            self.write_dot(self.label + "Before.dot", self.root, True)
+        if self.echo:
+            print()
+
+        # heapify in one pass, level_order doesn't need any links fixed after
+        with self.phase("heapify"):
             self.heapify(self.root)
-            # make sure the links always hold up if we heapify more than once
-            self.set_generation_links(self.root)
+
+        # walking the whole tree again is only worth it when debugging
+        self.check_heap()
 
         # make the .dot file for graphviz (heapified)
-        self.print_tree_levels(self.root, False)
-        with open(self.label + "After.dot", "w") as file:
-            file.write(self.msg)
-        print(self.msg)
+        with self.phase("render_after"):
+            self.write_dot(self.label + "After.dot", self.root, False)
@@ -0,0 +1,239 @@
+"""
+This file contains a client for HeapServer and a load generator built on it. The
+load generator opens many connections at once, each one sending a mix of pushes
+and pops (one at a time, or a window of requests in flight), and reports the p50
+and p99 latency of the requests and the operations per second as JSON.
+
+usage: python3 HeapClient.py [--socket PATH | --port N] [--connections N]
+                             [--requests N] [--push-ratio R] [--window N]
+                             [--output FILE]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+class HeapClient():
+    """
+    HeapClient class sends requests to a HeapServer over one connection and reads
+    the answers back in order.
+    """
+
+    def __init__(self, reader, writer):
+        """
+        Creates a client for an open connection, use connect to open one.
+
+        Args:
+            reader (asyncio.StreamReader): The connection's input
+            writer (asyncio.StreamWriter): The connection's output
+        """
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, socket_path=None, host="127.0.0.1", port=8765):
+        """
+        Opens a connection to a server.
+
+        Args:
+            socket_path (str): Optional, the server's Unix socket instead of TCP
+            host (str): Optional, the server's address
+            port (int): Optional, the server's TCP port
+
+        Return:
+            HeapClient: The connected client
+        """
+        if socket_path:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def send(self, op, **fields):
+        """
+        Sends a request without waiting for its answer.
+
+        Args:
+            op (str): The op of the request
+            fields: The rest of the request, like path or k
+        """
+        fields["op"] = op
+        self.writer.write(json.dumps(fields).encode() + b"\n")
+        await self.writer.drain()
+
+    async def receive(self):
+        """
+        Reads the answer to the oldest request that hasn't been answered.
+
+        Return:
+            The result of the request
+
+        raise:
+            RuntimeError if the request failed or the server closed the connection
+        """
+        line = await self.reader.readline()
+        if not line:
+            raise RuntimeError("the server closed the connection")
+        answer = json.loads(line)
+        if not answer["ok"]:
+            raise RuntimeError(answer["error"])
+        return answer["result"]
+
+    async def request(self, op, **fields):
+        """
+        Sends a request and waits for its answer.
+
+        Args:
+            op (str): The op of the request
+            fields: The rest of the request, like path or k
+
+        Return:
+            The result of the request
+
+        raise:
+            RuntimeError if the request failed
+        """
+        await self.send(op, **fields)
+        return await self.receive()
+
+    async def close(self):
+        """
+        Closes the connection.
+        """
+        self.writer.close()
+        await self.writer.wait_closed()
+
+def percentile(values, fraction):
+    """
+    Gives the value a fraction of the sorted values are at or below.
+
+    Args:
+        values (list): The values, sorted
+        fraction (float): Between 0 and 1, 0.99 for p99
+
+    Return:
+        float: The value, None if there are no values
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+async def connection_load(client, count, push_ratio, window, rng, latencies, failures):
+    """
+    Sends count requests over one connection with up to window of them in flight,
+    timing each one from when it is sent to when its answer comes back.
+
+    Args:
+        client (HeapClient): The connection to use
+        count (int): The number of requests to send
+        push_ratio (float): The part of the requests that are pushes, the rest pop
+        window (int): The most requests in flight at once
+        rng (random.Random): The random number generator to pick requests with
+        latencies (list): Where to put the seconds every request took
+        failures (list): Where to put the errors of failed requests
+    """
+    sent = []
+    for number in range(count):
+        if rng.random() < push_ratio:
+            path = "0 " + " ".join(str(rng.randint(1, 99)) for _ in range(rng.randint(1, 12)))
+            await client.send("push", path=path)
+        else:
+            await client.send("pop")
+        sent.append(time.perf_counter())
+        # wait for the oldest answer once the window is full, and at the end
+        while len(sent) >= window or (number == count - 1 and sent):
+            try:
+                await client.receive()
+            except RuntimeError as error:
+                failures.append(str(error))
+            latencies.append(time.perf_counter() - sent.pop(0))
+
+async def load_test(connections, requests, push_ratio=0.5, window=1, socket_path=None,
+                    host="127.0.0.1", port=8765, seed=1):
+    """
+    Runs the load generator against a server.
+
+    Args:
+        connections (int): The number of connections sending at once
+        requests (int): The number of requests each connection sends
+        push_ratio (float): Optional, the part of the requests that are pushes
+        window (int): Optional, the most requests each connection has in flight
+        socket_path (str): Optional, the server's Unix socket instead of TCP
+        host (str): Optional, the server's address
+        port (int): Optional, the server's TCP port
+        seed (int): Optional, the seed for the requests
+
+    Return:
+        dict: The number of requests, the operations per second, the p50 and p99
+              latency in milliseconds and the number and kinds of failed requests
+    """
+    clients = [await HeapClient.connect(socket_path, host, port) for _ in range(connections)]
+    latencies, failures = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(connection_load(client, requests, push_ratio, window,
+                                           random.Random(seed + number), latencies, failures)
+                           for number, client in enumerate(clients)))
+    seconds = time.perf_counter() - start
+    for client in clients:
+        await client.close()
+
+    latencies.sort()
+    return {
+        "connections": connections,
+        "requests": len(latencies),
+        "push_ratio": push_ratio,
+        "window": window,
+        "seconds": seconds,
+        "ops_per_second": len(latencies) / seconds if seconds else None,
+        "p50_ms": percentile(latencies, 0.5) * 1000 if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) * 1000 if latencies else None,
+        "failed": len(failures),
+        "errors": sorted(set(failures)),
+    }
+
+def parse_args(argv=None):
+    """
+    Reads the command line arguments.
+
+    Args:
+        argv (list): Optional, the arguments to read, sys.argv[1:] if None
+
+    Return:
+        argparse.Namespace: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python3 HeapClient.py")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--socket", metavar="PATH", help="connect to a Unix socket")
+    where.add_argument("--port", type=int, default=8765,
+                       help="connect to this localhost TCP port (default 8765)")
+    parser.add_argument("--connections", type=int, default=32,
+                        help="number of connections sending at once")
+    parser.add_argument("--requests", type=int, default=1000,
+                        help="number of requests each connection sends")
+    parser.add_argument("--push-ratio", type=float, default=0.5,
+                        help="part of the requests that are pushes, the rest are pops")
+    parser.add_argument("--window", type=int, default=1,
+                        help="requests each connection keeps in flight")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON report to FILE instead of stdout")
+    return parser.parse_args(argv)
+
+def main():
+    """
+    Runs the load generator from the command line and writes the JSON report.
+    """
+    args = parse_args()
+    report = asyncio.run(load_test(args.connections, args.requests, args.push_ratio,
+                                   args.window, args.socket, port=args.port))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+
+# call main function
+if __name__ == '__main__':
+    main()
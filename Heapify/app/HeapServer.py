@@ -0,0 +1,345 @@
+"""
+This file runs a heap as a long lived service that other local processes talk
+to over a Unix socket or a localhost TCP port. Every request and every response
+is one line of JSON:
+
+    {"op": "load", "file": "listing1.txt"}   -> {"ok": true, "result": 9}
+    {"op": "push", "path": "0 4 1"}          -> {"ok": true, "result": null}
+    {"op": "pop"}                            -> {"ok": true, "result": {"path": ..., "priority": ...}}
+    {"op": "peek"}                           -> same as pop without taking it out
+    {"op": "top", "k": 3}                    -> the 3 shortest, "file" streams a file instead
+    {"op": "render", "label": "x"}           -> writes xAfter.dot in the server's directory,
+                                                gives back its name, the label can't be a path
+                                                "levels", "subtree", "summaries" and
+                                                "exact" work like in Heap.set_render
+    {"op": "len"}                            -> the number of paths in the heap
+
+A failed request gets {"ok": false, "error": "..."}. Requests from every
+connection go through one queue, and whatever has piled up while the last batch
+ran is run as the next batch: runs of pushes become one push_many and runs of
+pops one pop_many. Loading and rendering run in a worker thread so the server
+keeps taking requests while they do.
+
+usage: python3 HeapServer.py [--socket PATH | --port N] [--file FILE]
+                             [--arity D] [--key length|weight] [--tie-break] [--max]
+"""
+
+from ConcurrentHeap import ConcurrentHeap
+from Priority import Priority, KEYS
+import TopK
+import argparse
+import asyncio
+import json
+import os
+
+# requests that change the heap in place and can be batched
+BATCHED = ("push", "pop")
+
+def describe(node):
+    """
+    Turns a node into the JSON a response gives back.
+
+    Args:
+        node (PathNode): The node
+
+    Return:
+        dict: The path and its priority (without the tie break)
+    """
+    priority = node.priority[0] if isinstance(node.priority, tuple) else node.priority
+    return {"path": node.line.decode(), "priority": priority}
+
+def plain_label(label):
+    """
+    Checks that a render label is a plain name, so a client can't write .dot
+    files outside of the server's directory.
+
+    Args:
+        label (str): The label from the request
+
+    Return:
+        str: The label
+
+    raise:
+        ValueError if the label isn't a plain name
+    """
+    if (not isinstance(label, str) or not label or "\0" in label or os.sep in label
+            or (os.altsep and os.altsep in label)):
+        raise ValueError("render needs a plain label, not a path")
+    return label
+
+class HeapServer():
+    """
+    HeapServer class keeps a resident ConcurrentHeap and answers requests for it.
+    """
+
+    def __init__(self, arity=2, priority=None):
+        """
+        Creates a server with an empty heap.
+
+        Args:
+            arity (int): Optional, the number of children each node of the heap has
+            priority (Priority): Optional, what to order the paths by, path length if None
+        """
+        self.arity = arity
+        self.priority = priority
+        self.heap = self.new_heap(None)
+        self.requests = None
+
+    def new_heap(self, input_file):
+        """
+        Makes an empty heap with the server's options.
+
+        Args:
+            input_file (str): The file the heap will be read from, None if it won't be
+
+        Return:
+            ConcurrentHeap: The new heap
+        """
+        return ConcurrentHeap(input_file, "server", echo=False, priority=self.priority,
+                              arity=self.arity)
+
+    def load(self, input_file):
+        """
+        Reads and heapifies a file into a new heap, the old heap is only replaced
+        once the new one is ready.
+
+        Args:
+            input_file (str): The file to read
+
+        Return:
+            int: The number of paths loaded
+
+        raise:
+            ValueError if the file contains a node with an empty path
+        """
+        heap = self.new_heap(input_file)
+        heap.read_paths(input_file)
+        heap.build_complete_tree(1)
+        if heap.root:
+            heap.heapify(heap.root)
+        heap.temp_path = [0]
+        self.heap = heap
+        return len(heap)
+
+    async def handle(self, reader, writer):
+        """
+        Reads the requests of one connection and answers them in the order they
+        were sent. Requests are queued as soon as they are read, so a client can
+        send many without waiting for the answers.
+
+        Args:
+            reader (asyncio.StreamReader): The connection's input
+            writer (asyncio.StreamWriter): The connection's output
+        """
+        answers = asyncio.Queue()
+        responder = asyncio.ensure_future(self.respond(answers, writer))
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                answer = asyncio.get_running_loop().create_future()
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("a request has to be a JSON object")
+                except ValueError as error:
+                    answer.set_result({"ok": False, "error": "bad request: " + str(error)})
+                else:
+                    await self.requests.put((request, answer))
+                await answers.put(answer)
+        finally:
+            await answers.put(None)
+            await responder
+
+    async def respond(self, answers, writer):
+        """
+        Writes the answers of one connection in order as they are ready.
+
+        Args:
+            answers (asyncio.Queue): The futures of the answers, None after the last
+            writer (asyncio.StreamWriter): The connection's output
+        """
+        try:
+            while True:
+                answer = await answers.get()
+                if answer is None:
+                    break
+                writer.write(json.dumps(await answer).encode() + b"\n")
+                # only wait for the socket once nothing else is ready to send
+                if answers.empty():
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def run_batches(self):
+        """
+        Takes every request that is waiting and runs them as one batch, over and
+        over.
+        """
+        while True:
+            batch = [await self.requests.get()]
+            while not self.requests.empty():
+                batch.append(self.requests.get_nowait())
+            await self.run_batch(batch)
+
+    async def run_batch(self, batch):
+        """
+        Runs a batch in order, a run of pushes or pops in a row is done with one
+        push_many or pop_many.
+
+        Args:
+            batch (list): The (request, answer future) pairs
+        """
+        start = 0
+        while start < len(batch):
+            op = batch[start][0].get("op")
+            end = start + 1
+            if op in BATCHED:
+                while end < len(batch) and batch[end][0].get("op") == op:
+                    end += 1
+            run = batch[start:end]
+            # whatever a run fails with only fails its own requests, the loop goes on
+            try:
+                results = await self.run_requests(op, [request for request, answer in run])
+            except Exception as error:
+                results = [error] * len(run)
+            for (request, answer), result in zip(run, results):
+                if answer.done():
+                    continue
+                if isinstance(result, KeyError):
+                    answer.set_result({"ok": False, "error": "missing " + str(result)})
+                elif isinstance(result, Exception):
+                    message = str(result).strip() or type(result).__name__
+                    answer.set_result({"ok": False, "error": message})
+                else:
+                    answer.set_result({"ok": True, "result": result})
+            start = end
+
+    async def run_requests(self, op, requests):
+        """
+        Runs a run of requests that all have the same op.
+
+        Args:
+            op (str): The op of the requests
+            requests (list): The requests, more than one only for push and pop
+
+        Return:
+            list: The result of every request, or the error it failed with
+        """
+        heap = self.heap
+        if op == "push":
+            # every node is made on its own so a bad path only fails its own request
+            nodes, results = [], []
+            for request in requests:
+                path = request.get("path")
+                if not isinstance(path, str) or not path.strip():
+                    results.append(ValueError("push needs a path"))
+                    continue
+                try:
+                    nodes.append(heap.node(path))
+                except (ValueError, TypeError) as error:
+                    results.append(error)
+                else:
+                    results.append(None)
+            heap.push_many(nodes)
+            return results
+        if op == "pop":
+            nodes = heap.pop_many(len(requests))
+            empty = IndexError("pop from an empty heap")
+            return [describe(node) for node in nodes] + [empty] * (len(requests) - len(nodes))
+
+        request = requests[0]
+        loop = asyncio.get_running_loop()
+        if op == "peek":
+            return [describe(heap.peek())]
+        if op == "len":
+            return [len(heap)]
+        if op == "top":
+            k = int(request["k"])
+            if "file" in request:
+                nodes = await loop.run_in_executor(
+                    None, TopK.top_k_file, request["file"], k, self.priority)
+            else:
+                nodes = heap.smallest(k)
+            return [[describe(node) for node in nodes]]
+        if op == "load":
+            return [await loop.run_in_executor(None, self.load, request["file"])]
+        if op == "render":
+            file_name = plain_label(request.get("label", "server")) + "After.dot"
+            heap.set_render(request.get("levels"), request.get("subtree"),
+                            bool(request.get("summaries")), bool(request.get("exact")))
+            await loop.run_in_executor(None, heap.write_dot, file_name, heap.root, False)
+            return [file_name]
+        raise ValueError("unknown op " + repr(op))
+
+    async def serve(self, socket_path=None, host="127.0.0.1", port=8765, ready=None):
+        """
+        Serves requests until cancelled.
+
+        Args:
+            socket_path (str): Optional, the Unix socket to listen on instead of TCP
+            host (str): Optional, the address to listen on
+            port (int): Optional, the TCP port to listen on, 0 for any free port
+            ready (asyncio.Future): Optional, given the server once it is listening
+        """
+        self.requests = asyncio.Queue()
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle, socket_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        batches = asyncio.ensure_future(self.run_batches())
+        if ready is not None:
+            ready.set_result(server)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batches.cancel()
+
+def parse_args(argv=None):
+    """
+    Reads the command line arguments.
+
+    Args:
+        argv (list): Optional, the arguments to read, sys.argv[1:] if None
+
+    Return:
+        argparse.Namespace: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python3 HeapServer.py")
+    where = parser.add_mutually_exclusive_group()
+    where.add_argument("--socket", metavar="PATH", help="listen on a Unix socket")
+    where.add_argument("--port", type=int, default=8765,
+                       help="listen on this localhost TCP port (default 8765)")
+    parser.add_argument("--file", help="load this file before serving")
+    parser.add_argument("--arity", type=int, default=2, metavar="D",
+                        help="number of children per node")
+    parser.add_argument("--key", default="length", choices=KEYS,
+                        help="order paths by their length (default) or the sum of their tokens")
+    parser.add_argument("--tie-break", action="store_true",
+                        help="order paths with equal keys by their text")
+    parser.add_argument("--max", action="store_true",
+                        help="keep a max heap, the biggest key on top")
+    return parser.parse_args(argv)
+
+def main():
+    """
+    Runs the server from the command line until it is interrupted.
+    """
+    args = parse_args()
+    server = HeapServer(args.arity, Priority(args.key, args.tie_break, args.max))
+    try:
+        if args.file:
+            print("loaded", server.load(args.file), "paths")
+        asyncio.run(server.serve(args.socket, port=args.port))
+    except (FileNotFoundError, ValueError) as error:
+        print(error)
+    except KeyboardInterrupt:
+        pass
+
+# call main function
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,343 @@
+"""
+This file contains a heap that can be merged with another heap in O(1). It is a
+pairing heap: every node can have any number of children, kept with the same
+PathNode pointers the binary tree uses, left is the first child and right is the
+next sibling. Merging two heaps just puts the root with the longer path under
+the other root, push merges a single node in and pop merges the children of the
+root back together in two passes (amortized O(log n)).
+
+The tree isn't complete, so the .dot files number the nodes level by level like
+the other heaps but draw the paths from each node to its real children.
+"""
+
+from Heap import Heap
+from PathNode import PathNode
+import Priority
+import Snapshot
+
+class PairingHeap(Heap):
+    """
+    PairingHeap class is a Heap whose nodes are pushed straight into a pairing
+    heap, so the tree is a heap as soon as it is built and heapify has nothing
+    left to do. Other heaps can be merged into it.
+    """
+
+    def __init__(self, input_file, label, debug=False, echo=True, workers=1, stats=None,
+                 priority=None, arity=2, trie=False):
+        """
+        Creates an empty pairing heap, same as Heap.
+
+        args:
+            input_file (str): the file to create nodes from (command line argument)
+            label (str): the label to give to the .dot files (command line argument)
+            debug (bool): Optional, check the result with is_heap after every change
+            echo (bool): Optional, also print the .dot files to stdout
+            workers (int): Optional, the number of processes to read the input with
+            stats (Stats): Optional, record phase times and operation counts in stats
+            priority (Priority): Optional, what to order the paths by, path length if None
+            arity (int): Optional, only 2 is allowed, a node has as many children as
+                         the merges give it
+            trie (bool): Optional, intern the paths in a prefix trie as they are read
+
+        raise:
+            ValueError if arity isn't 2
+        """
+        super().__init__(input_file, label, debug, echo, workers, stats, priority, arity, trie)
+        self.size = 0
+
+    def __len__(self):
+        """
+        Gives the number of nodes in the heap
+
+        Return:
+            int: The number of nodes
+        """
+        return self.size
+
+    def build_complete_tree(self, index, parent=None):
+        """
+        Pushes every path in temp_path from index on.
+
+        args:
+            index (int): The index of the first path in temp_path (always 1)
+            parent: Unused, kept so the signature matches Heap
+
+        returns:
+            PathNode: The root of the heap, None if there are no paths
+        """
+        for path in self.temp_path[index:]:
+            self.root = self.meld(self.root, self.make_node(path))
+            self.size += 1
+        return self.root
+
+    def set_level_end(self, root):
+        """
+        Levels of a pairing heap have no fixed ends so there is nothing to set.
+
+        Args:
+            root (PathNode): The root of the heap
+        """
+
+    def set_generation_links(self, root):
+        """
+        There are no generation links in a pairing heap.
+
+        args:
+            root (PathNode): The root of the heap
+        """
+
+    def heapify(self, root):
+        """
+        Every push and merge keeps the heap in order, so there is nothing to do.
+
+        args:
+            root (PathNode): The root of the heap
+        """
+
+    def meld(self, first, second):
+        """
+        Merges two heaps by making the root with the longer path the first child
+        of the other root, first stays on top when they are equal.
+
+        args:
+            first (PathNode): The root of one heap (can be None)
+            second (PathNode): The root of the other heap (can be None)
+
+        returns:
+            PathNode: The root of the merged heap
+        """
+        if first is None:
+            return second
+        if second is None:
+            return first
+        if second < first:
+            first, second = second, first
+        second.right = first.left
+        second.parent = first
+        first.left = second
+        if self.stats:
+            self.stats.count("melds")
+        return first
+
+    def children(self, node):
+        """
+        Generates the children of a node, left to right.
+
+        args:
+            node (PathNode): The node whose children to give
+
+        Yields:
+            PathNode: The next child
+        """
+        child = node.left
+        while child:
+            yield child
+            child = child.right
+
+    def subtree_root(self, root, number):
+        """
+        Finds the node with a number in the level order numbering under root
+        (the numbers the .dot files give the nodes). The heap has no shape to
+        work it out from, so the nodes before it are walked.
+
+        args:
+            root (PathNode): The root of the heap
+            number (int): The number of the node, root is 0
+
+        returns:
+            PathNode: The node
+
+        raise:
+            ValueError if the heap doesn't have that many nodes
+        """
+        for level, index, node in self.level_order(root):
+            if index == number:
+                return node
+        raise ValueError("\nError! The heap has no node " + str(number) + ".\n")
+
+    def subtree_size(self, root):
+        """
+        The size of a subtree can't be known without walking it, so summaries
+        only count it when they are exact.
+
+        args:
+            root (PathNode): The root of the subtree
+
+        returns:
+            None
+        """
+        return None
+
+    def merge(self, other):
+        """
+        Merges another heap into this one. Another PairingHeap is merged in O(1)
+        and left empty, its nodes now belong to this heap. Any other Heap has its
+        paths copied in one at a time and is left as it was.
+
+        args:
+            other (Heap): The heap to merge in, ordered by the same priority
+
+        raise:
+            ValueError if other is this heap, or a PairingHeap ordered by another
+            priority
+        """
+        if other is self:
+            raise ValueError("\nError! A heap can't be merged into itself.\n")
+        if isinstance(other, PairingHeap):
+            if not Priority.same_order(self.priority, other.priority):
+                raise ValueError("\nError! Can't merge a heap ordered by another key, tie "
+                                 "break or max heap setting.\n")
+            self.root = self.meld(self.root, other.root)
+            self.size += other.size
+            other.root = None
+            other.size = 0
+        elif other.root is not None:
+            for node in other.level_nodes(other.root):
+                self.push(node.line)
+        self.check_heap()
+
+    def push(self, path):
+        """
+        Adds a path to the heap in O(1).
+
+        args:
+            path (PathNode, bytes, str or list): The path to add, anything PathNode takes
+
+        returns:
+            PathNode: The node holding the path
+        """
+        node = path if isinstance(path, PathNode) else self.make_node(path)
+        node.left = node.right = node.parent = None
+        self.root = self.meld(self.root, node)
+        self.size += 1
+        self.check_heap()
+        return node
+
+    def peek(self):
+        """
+        Gives the node with the shortest path without taking it out.
+
+        returns:
+            PathNode: The top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        if self.root is None:
+            raise IndexError("peek from an empty heap")
+        return self.root
+
+    def pop(self):
+        """
+        Takes the node with the shortest path out of the heap. Its children are
+        merged in pairs left to right, then the pairs are merged right to left.
+
+        returns:
+            PathNode: The old top of the heap
+
+        raise:
+            IndexError if the heap is empty
+        """
+        if self.root is None:
+            raise IndexError("pop from an empty heap")
+        top = self.root
+
+        # first pass, merge the children two at a time
+        pairs = []
+        child = top.left
+        while child:
+            second = child.right
+            following = second.right if second else None
+            child.right = child.parent = None
+            if second:
+                second.right = second.parent = None
+            pairs.append(self.meld(child, second))
+            child = following
+
+        # second pass, merge the pairs from the last one back to the first
+        root = None
+        for pair in reversed(pairs):
+            root = self.meld(pair, root)
+
+        self.root = root
+        self.size -= 1
+        top.left = None
+        self.check_heap()
+        return top
+
+    def level_order(self, root):
+        """
+        Generates the nodes of the heap level by level, left to right, with their
+        level and number, going through every child of each node.
+
+        Args:
+            root (PathNode): The root of the heap
+
+        Yields:
+            tuple: The (level, index, node) of the next node, the root is level 0
+                   and index 0
+        """
+        level = 0
+        index = 0
+        current = [root] if root else []
+        while current:
+            below = []
+            for node in current:
+                yield level, index, node
+                index += 1
+                child = node.left
+                while child:
+                    below.append(child)
+                    child = child.right
+            current = below
+            level += 1
+
+    def edge_lines(self, root, count):
+        """
+        Generates the paths from every node to each of its children. Nodes are
+        numbered level by level, so the children of a node are numbered right
+        after the children of the node before it.
+
+        Args:
+            root (PathNode): The root of the heap
+            count (int): The number of nodes printed
+
+        Yields:
+            str: The line for the next path
+        """
+        next_node = 1
+        for level, index, node in self.level_order(root):
+            for child in self.children(node):
+                yield "\t" + str(index) + " -> " + str(next_node) + ";\n"
+                next_node += 1
+
+    def is_heap(self, root):
+        """
+        Checks that no node has a child smaller than itself.
+
+        Args:
+            root (PathNode): The root of the heap
+
+        Return:
+            boolean: True if the tree is a heap, False otherwise
+        """
+        stack = [root]
+        while stack:
+            root = stack.pop()
+            for child in self.children(root):
+                if child < root:
+                    return False
+                stack.append(child)
+        return True
+
+    def save_snapshot(self, file_name):
+        """
+        Saves the heap as a snapshot. A pairing heap isn't laid out like an array
+        heap, so the nodes are saved in sorted order (which is a heap of any arity).
+
+        Args:
+            file_name (str): The snapshot file to write
+        """
+        nodes = sorted(self.level_nodes(self.root), key=lambda node: node.priority)
+        Snapshot.save(file_name, nodes, self.priority, self.arity,
+                      self.input_file)
@@ -12,8 +12,20 @@ class PathNode():
     PathNode class can create a node that contains a path, left, right, parent,
     and generation_right pointers. It also contains values if the node is the
     last node in a level or the last node in the tree.
+
+    The path is kept as the raw bytes of its line with the tokens separated by
+    single spaces, and the number of tokens is counted once and cached as the
+    priority that every comparison uses. A Heap with another Priority overwrites
+    the priority when it makes the node, nodes with equal priorities are equal.
+    The attributes live in __slots__ so there is no per node __dict__. A node
+    takes about 150 bytes on 64 bit CPython (the target is under 200) for the
+    typical 2-12 token path, where a list of token strings in a __dict__ took
+    about 600.
     """
 
+    __slots__ = ("line", "priority", "left", "right", "parent", "generation_right",
+                 "is_level_end", "is_last_node", "position")
+
     def __init__(self, path, parent = None):
         """
         Creates a new PathNode object with a path, parent, left, right,
@@ -21,17 +33,38 @@ class PathNode():
         last node, left, and right are initially set to None.
 
         Args:
-            path (Str): The path for the node to contain
+            path (bytes, str or list): The path for the node to contain, either the
+                                       line of tokens (single space separated bytes,
+                                       or a str) or the list of token strings
             parent (PathNode): Optional, the parent of the node being created,
                                the value if not passed in is None
         """
-        self.path = path
+        if isinstance(path, bytes):
+            self.line = path
+        elif isinstance(path, str):
+            self.line = " ".join(path.split()).encode()
+        else:
+            self.line = " ".join(path).encode()
+        # the number of tokens in the path, an empty line has none
+        self.priority = self.line.count(b" ") + 1 if self.line else 0
         self.left = None
         self.right = None
         self.parent = parent
         self.generation_right = None
         self.is_level_end = False
         self.is_last_node = False
+        # the index of the node in an ArrayHeap, None if it isn't in one
+        self.position = None
+
+    @property
+    def path(self):
+        """
+        The path as a list of token strings, made from the line when asked for.
+
+        Return:
+            list: The tokens of the path
+        """
+        return self.line.decode().split()
 
     def swap_left(self, other):
         """
@@ -71,16 +104,18 @@ class PathNode():
 
         # fix parents lefts and rights
         if original_parent:
-            if original_parent.right == self:
+            if original_parent.right is self:
                 original_parent.right = other
-            elif original_parent.left == self:
+            elif original_parent.left is self:
                 original_parent.left = other
             
-        # reconnect lower parent
-        if self.left:
-            self.left.parent = other
-        if self.right:
-            self.right.parent = other
+        # reconnect the children of both nodes to their new parents
+        for child in (self.left, self.right):
+            if child:
+                child.parent = self
+        for child in (other.left, other.right):
+            if child:
+                child.parent = other
         
         # fix generation right pointers and swap level end and last node value
         self.generation_right, other.generation_right = other.generation_right, self.generation_right
@@ -94,19 +129,22 @@ class PathNode():
         Return:
             The string representation of the node ex. "1(0, 2)"
         """
-        return '"' + str(len(self.path) - 1) + "(" + ", ".join(self.path) + ')"'
+        # the number before the path is its number of hops, whatever the priority is
+        hops = self.line.count(b" ") if self.line else -1
+        return '"' + str(hops) + "(" + self.line.replace(b" ", b", ").decode() + ')"'
 
     def __eq__(self, other):
         """
-        Checks equality of two nodes with their paths
+        Checks equality of two nodes with their priorities, so equality agrees
+        with the ordering
 
         Args:
             other (PathNode): The node to compare with
 
         Return:
-            True if the paths are the same, False otherwise
+            True if the priorities are the same, False otherwise
         """
-        return self.path == other.path
+        return self.priority == other.priority
     
     def __lt__(self, other):
         """
@@ -118,7 +156,7 @@ class PathNode():
         Return:
             True if the path is less than other, False otherwise
         """
-        return len(self.path) < len(other.path)
+        return self.priority < other.priority
 
     def __gt__(self, other):
         """
@@ -130,7 +168,7 @@ class PathNode():
         Return:
             True if the path is greater than other, False otherwise
         """
-        return len(self.path) > len(other.path)
+        return self.priority > other.priority
 
     def __le__(self, other):
         """
@@ -142,10 +180,7 @@ class PathNode():
         Return:
             True if the path is less than or equal to other, False otherwise
         """
-        if len(self.path) == len(other.path):
-            return True
-        else:
-            return len(self.path) < len(other.path)
+        return self.priority <= other.priority
 
     def __ge__(self, other):
         """
@@ -157,7 +192,132 @@ class PathNode():
         Return:
             True if the path is greater than or equal to other, False otherwise
         """
-        if len(self.path) == len(other.path):
-            return True
-        else:
-            return len(self.path) > len(other.path)
\ No newline at end of file
+        return self.priority >= other.priority
+
+
+class CountingPathNode(PathNode):
+    """
+    CountingPathNode class is a PathNode that counts every comparison it makes in
+    the class attribute comparisons. Instrumented heaps make these instead of
+    PathNodes so plain heaps don't pay for the counting.
+    """
+
+    __slots__ = ()
+    comparisons = 0
+
+    def __lt__(self, other):
+        """
+        Counts the comparison and checks if the node is less than other
+
+        Args:
+            other (PathNode): The node to compare with
+
+        Return:
+            True if the path is less than other, False otherwise
+        """
+        CountingPathNode.comparisons += 1
+        return self.priority < other.priority
+
+    def __gt__(self, other):
+        """
+        Counts the comparison and checks if the node is greater than other
+
+        Args:
+            other (PathNode): The node to compare with
+
+        Return:
+            True if the path is greater than other, False otherwise
+        """
+        CountingPathNode.comparisons += 1
+        return self.priority > other.priority
+
+    def __le__(self, other):
+        """
+        Counts the comparison and checks if the node is less than or equal to other
+
+        Args:
+            other (PathNode): The node to compare with
+
+        Return:
+            True if the path is less than or equal to other, False otherwise
+        """
+        CountingPathNode.comparisons += 1
+        return self.priority <= other.priority
+
+    def __ge__(self, other):
+        """
+        Counts the comparison and checks if the node is greater than or equal to other
+
+        Args:
+            other (PathNode): The node to compare with
+
+        Return:
+            True if the path is greater than or equal to other, False otherwise
+        """
+        CountingPathNode.comparisons += 1
+        return self.priority >= other.priority
+
+
+class TriePathNode(PathNode):
+    """
+    TriePathNode class is a PathNode whose path is interned in a PathTrie. The node
+    keeps only the trie and the leaf of its path, the line is put back together
+    from the trie every time it is asked for, and the length is cached as the
+    priority like in a PathNode.
+
+    The leaf is kept in the line slot of PathNode, which the line property would
+    otherwise leave unused in every node.
+    """
+
+    __slots__ = ("trie",)
+    leaf = PathNode.line
+
+    def __init__(self, path, parent=None, trie=None):
+        """
+        Creates a new TriePathNode, interning the path if it isn't a leaf already.
+
+        Args:
+            path (int, bytes, str or list): The leaf of the path in trie, or anything
+                                            PathNode takes
+            parent (PathNode): Optional, the parent of the node being created
+            trie (PathTrie): The trie the path is kept in
+        """
+        self.trie = trie
+        self.leaf = path if isinstance(path, int) else trie.add(path)
+        self.priority = trie.length(self.leaf)
+        self.left = None
+        self.right = None
+        self.parent = parent
+        self.generation_right = None
+        self.is_level_end = False
+        self.is_last_node = False
+        self.position = None
+
+    @property
+    def line(self):
+        """
+        The single spaced path, put back together from the trie.
+
+        Return:
+            bytes: The path
+        """
+        return self.trie.line(self.leaf)
+
+    @line.setter
+    def line(self, line):
+        """
+        Gives the node a new path, interning it in the trie.
+
+        Args:
+            line (bytes): The new single spaced path
+        """
+        self.leaf = self.trie.add(line)
+
+
+class CountingTriePathNode(TriePathNode, CountingPathNode):
+    """
+    CountingTriePathNode class is a TriePathNode that counts its comparisons like
+    a CountingPathNode, for instrumented heaps that keep their paths in a trie.
+    """
+
+    __slots__ = ()
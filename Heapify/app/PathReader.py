@@ -0,0 +1,163 @@
+"""
+This file contains the fast loader for path listings. The input file is memory
+mapped and cut into large chunks at line ends, and every chunk is split into
+lines with a few bytes level calls instead of a Python loop over the lines. Each
+path comes out as the single spaced bytes of its line, which is what PathNode
+takes, so no token strings are made until a node is printed. The chunks can be
+parsed by several worker processes for very large files.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import os
+
+# number of bytes parsed at a time
+CHUNK_SIZE = 1 << 24
+
+# if a chunk contains any of these its lines need their whitespace cleaned up
+IRREGULAR_SPACE = (b"\t", b"\r", b"\v", b"\f", b"  ", b"\n ", b" \n")
+
+def empty_path_error(input_file, line_number):
+    """
+    Makes the error for a line that only has the start node (an empty path)
+
+    Args:
+        input_file (str): The file the empty path is in
+        line_number (int): The line of the file the empty path is on (1 based)
+
+    Return:
+        ValueError: The error to raise
+    """
+    return ValueError("\nError! Input can't contain node with empty path (line "
+                      + str(line_number) + " of " + str(input_file) + ").\n")
+
+def chunk_bounds(view, chunk_size=CHUNK_SIZE):
+    """
+    Generates the start and end offsets of chunks of about chunk_size bytes,
+    each chunk ends just after a new line (or at the end of the file).
+
+    Args:
+        view (mmap.mmap): The mapped file
+        chunk_size (int): Optional, the size to aim for
+
+    Yields:
+        tuple: The (start, end) offsets of the next chunk
+    """
+    size = len(view)
+    start = 0
+    while start < size:
+        end = min(start + chunk_size, size)
+        if end < size:
+            # move the end up to just past the next new line
+            newline = view.find(b"\n", end - 1)
+            end = size if newline == -1 else newline + 1
+        yield start, end
+        start = end
+
+def parse_chunk(data):
+    """
+    Splits a chunk into its paths, one per line, with the tokens separated by
+    single spaces.
+
+    Args:
+        data (bytes): The chunk, a run of whole lines
+
+    Return:
+        tuple: The list of paths and the index of the first empty path in it,
+               or None if there isn't one
+    """
+    lines = data.split(b"\n")
+    # the last new line doesn't start another line
+    if not lines[-1]:
+        lines.pop()
+
+    # only clean up the lines when the chunk isn't already single spaced
+    if data[:1] == b" " or data[-1:] == b" " or any(space in data for space in IRREGULAR_SPACE):
+        lines = [b" ".join(line.split()) for line in lines]
+
+    # a path with only the start node is empty
+    try:
+        bad = lines.index(b"0")
+    except ValueError:
+        bad = None
+    return lines, bad
+
+def parse_range(input_file, start, end):
+    """
+    Maps input_file and parses the chunk between start and end, for the worker
+    processes.
+
+    Args:
+        input_file (str): The file to read from
+        start (int): The offset the chunk starts at
+        end (int): The offset the chunk ends at
+
+    Return:
+        tuple: The list of paths and the index of the first empty path in it
+    """
+    with open(input_file, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return parse_chunk(view[start:end])
+
+def iter_paths(input_file, chunk_size=CHUNK_SIZE):
+    """
+    Generates the paths in input_file one chunk at a time, so only one chunk of
+    the file is held in memory.
+
+    Args:
+        input_file (str): The file to read from
+        chunk_size (int): Optional, the number of bytes to parse at a time
+
+    Yields:
+        bytes: The next path
+
+    raise:
+        ValueError if an input contains a node with an empty path
+    """
+    with open(input_file, "rb") as file:
+        # an empty file can't be mapped
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            line_number = 0
+            for start, end in chunk_bounds(view, chunk_size):
+                paths, bad = parse_chunk(view[start:end])
+                if bad is not None:
+                    raise empty_path_error(input_file, line_number + bad + 1)
+                line_number += len(paths)
+                yield from paths
+
+def read_paths(input_file, workers=1, chunk_size=CHUNK_SIZE):
+    """
+    Reads all of the paths in input_file. With more than one worker the chunks
+    are parsed in a process pool and put back together in file order.
+
+    Args:
+        input_file (str): The file to read from
+        workers (int): Optional, the number of processes to parse with
+        chunk_size (int): Optional, the number of bytes to parse at a time
+
+    Return:
+        list: The paths in file order
+
+    raise:
+        ValueError if an input contains a node with an empty path
+    """
+    if workers <= 1:
+        return list(iter_paths(input_file, chunk_size))
+
+    with open(input_file, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            bounds = list(chunk_bounds(view, chunk_size))
+
+    paths = []
+    with ProcessPoolExecutor(workers) as pool:
+        starts = [start for start, end in bounds]
+        ends = [end for start, end in bounds]
+        for chunk, bad in pool.map(parse_range, [input_file] * len(bounds), starts, ends):
+            if bad is not None:
+                raise empty_path_error(input_file, len(paths) + bad + 1)
+            paths.extend(chunk)
+    return paths
@@ -0,0 +1,245 @@
+"""
+This file contains the prefix trie paths can be interned in. Most paths in a
+listing share their start with other paths (every path starts at 0 and many go
+on through the same few nodes) so the trie keeps every shared prefix once. A
+path is then just the number of its last trie node, the leaf, and its tokens are
+put back together by walking up from the leaf when they are needed.
+
+The trie is kept in flat arrays instead of node objects: for trie node i,
+parents[i] is the node above it, labels[i] is the number of its token and
+depths[i] is the number of tokens from the root down to it. The root is node 0
+(the empty path). Tokens are numbered once in tokens/token_ids.
+
+Finding a child needs the children dict, which takes far more memory than the
+arrays, so compact drops it once a listing is read. Paths added after that (a
+push or a decrease_key) start a new dict of their own and only share prefixes
+with each other, so the dict stays as small as what was added since.
+
+A TrieLine stands in for the line in a tie broken priority, it compares like
+the line (and with plain line bytes) but only puts it back together when two
+keys tie.
+"""
+
+from array import array
+
+class PathTrie():
+    """
+    PathTrie class interns paths as leaves of a prefix trie and turns leaves back
+    into paths.
+    """
+
+    def __init__(self):
+        """
+        Creates an empty trie with just the root.
+        """
+        self.tokens = []
+        self.parents = array("I", [0])
+        self.labels = array("I", [0])
+        self.depths = array("I", [0])
+        # (parent << 32 | token number) -> child, one dict for the whole trie
+        self.children = {}
+        self.token_ids = {}
+
+    def __len__(self):
+        """
+        Gives the number of trie nodes, the root included
+
+        Return:
+            int: The number of trie nodes
+        """
+        return len(self.parents)
+
+    def add(self, path):
+        """
+        Adds a path to the trie, only the tokens past the longest prefix already in
+        the trie make new trie nodes.
+
+        Args:
+            path (bytes, str or list): The path, the line of tokens (bytes or str)
+                                       or the list of token strings
+
+        Return:
+            int: The leaf of the path, the same number for equal paths added
+                 between two compacts
+        """
+        if isinstance(path, bytes):
+            tokens = path.split()
+        elif isinstance(path, str):
+            tokens = path.encode().split()
+        else:
+            tokens = [token.encode() for token in path]
+
+        token_ids = self.token_ids
+        children = self.children
+        node = 0
+        for token in tokens:
+            token_id = token_ids.get(token)
+            if token_id is None:
+                token_id = token_ids[token] = len(self.tokens)
+                self.tokens.append(token)
+            key = node << 32 | token_id
+            child = children.get(key)
+            if child is None:
+                child = children[key] = len(self.parents)
+                self.parents.append(node)
+                self.labels.append(token_id)
+                self.depths.append(self.depths[node] + 1)
+            node = child
+        return node
+
+    def compact(self):
+        """
+        Drops the dicts that are only needed to add paths, leaves and lines stay
+        the same. Paths added later go in new, empty dicts.
+        """
+        self.children = {}
+        self.token_ids = {}
+
+    def line(self, leaf):
+        """
+        Puts the path of a leaf back together.
+
+        Args:
+            leaf (int): The leaf from add
+
+        Return:
+            bytes: The single spaced path
+        """
+        tokens = self.tokens
+        parents = self.parents
+        labels = self.labels
+        path = []
+        while leaf:
+            path.append(tokens[labels[leaf]])
+            leaf = parents[leaf]
+        path.reverse()
+        return b" ".join(path)
+
+    def length(self, leaf):
+        """
+        Gives the number of tokens in the path of a leaf without walking it.
+
+        Args:
+            leaf (int): The leaf from add
+
+        Return:
+            int: The number of tokens
+        """
+        return self.depths[leaf]
+
+
+def line_of(key):
+    """
+    Gives the line a tie break key stands for.
+
+    Args:
+        key (TrieLine or bytes): The key, or the line itself
+
+    Return:
+        bytes: The single spaced path
+    """
+    return key if isinstance(key, bytes) else key.trie.line(key.leaf)
+
+class TrieLine():
+    """
+    TrieLine class is the line of a leaf as a tie break key. Keys compare the way
+    their lines do, with each other and with plain lines (the priorities of nodes
+    loaded from a snapshot), so the order is the same as with the lines
+    themselves, but only the trie and the leaf are kept.
+    """
+
+    __slots__ = ("trie", "leaf")
+
+    def __init__(self, trie, leaf):
+        """
+        Creates the key of a leaf.
+
+        Args:
+            trie (PathTrie): The trie the leaf is in
+            leaf (int): The leaf from add
+        """
+        self.trie = trie
+        self.leaf = leaf
+
+    def same_leaf(self, other):
+        """
+        Checks if the other key is the same leaf, which is the same line without
+        putting it back together
+
+        Args:
+            other (TrieLine or bytes): The key to compare with
+
+        Return:
+            True if both are the same leaf of the same trie, False otherwise
+        """
+        return (isinstance(other, TrieLine) and other.trie is self.trie
+                and other.leaf == self.leaf)
+
+    def __eq__(self, other):
+        """
+        Checks if two keys have the same line
+
+        Args:
+            other (TrieLine or bytes): The key to compare with
+
+        Return:
+            True if the lines are the same, False otherwise
+        """
+        return self.same_leaf(other) or self.trie.line(self.leaf) == line_of(other)
+
+    def __hash__(self):
+        """
+        Hashes the key like its line, so it hashes the same as equal keys and lines
+
+        Return:
+            int: The hash
+        """
+        return hash(self.trie.line(self.leaf))
+
+    def __lt__(self, other):
+        """
+        Checks if the line of this key comes before the other's
+
+        Args:
+            other (TrieLine or bytes): The key to compare with
+
+        Return:
+            True if this line is smaller, False otherwise
+        """
+        return self.trie.line(self.leaf) < line_of(other)
+
+    def __gt__(self, other):
+        """
+        Checks if the line of this key comes after the other's
+
+        Args:
+            other (TrieLine or bytes): The key to compare with
+
+        Return:
+            True if this line is bigger, False otherwise
+        """
+        return self.trie.line(self.leaf) > line_of(other)
+
+    def __le__(self, other):
+        """
+        Checks if the line of this key doesn't come after the other's
+
+        Args:
+            other (TrieLine or bytes): The key to compare with
+
+        Return:
+            True if this line is smaller or the same, False otherwise
+        """
+        return self.same_leaf(other) or self.trie.line(self.leaf) <= line_of(other)
+
+    def __ge__(self, other):
+        """
+        Checks if the line of this key doesn't come before the other's
+
+        Args:
+            other (TrieLine or bytes): The key to compare with
+
+        Return:
+            True if this line is bigger or the same, False otherwise
+        """
+        return self.same_leaf(other) or self.trie.line(self.leaf) >= line_of(other)
@@ -0,0 +1,103 @@
+"""
+This file contains the priority functions a Heap can order its paths by. The
+default is the number of tokens in the path (its length), the same as a plain
+PathNode. A Priority is run once when a node is made and the result is cached
+as the node's priority, so every comparison after that is a plain number
+compare (or a tuple compare when ties are broken by the path).
+"""
+
+def length(line):
+    """
+    The number of tokens in the path.
+
+    Args:
+        line (bytes): The single spaced path
+
+    Return:
+        int: The number of tokens
+    """
+    return line.count(b" ") + 1 if line else 0
+
+def weight(line):
+    """
+    The sum of the numeric tokens of the path, for paths whose tokens are hop
+    weights like 77.4.
+
+    Args:
+        line (bytes): The single spaced path
+
+    Return:
+        float: The sum of the tokens
+
+    raise:
+        ValueError if a token isn't a number
+    """
+    return sum(map(float, line.split()))
+
+# the keys that can be picked by name
+KEYS = {"length": length, "weight": weight}
+
+def same_order(first, second):
+    """
+    Checks if two priorities order paths the same way.
+
+    Args:
+        first (Priority): A priority, path length if None
+        second (Priority): The other priority, path length if None
+
+    Return:
+        True if they have the same key, tie break and max heap setting, False otherwise
+    """
+    settings = [(length, False, False) if priority is None
+                else (priority.key, priority.tie_break, priority.max_heap)
+                for priority in (first, second)]
+    return settings[0] == settings[1]
+
+class Priority():
+    """
+    Priority class turns a key function into the priority a node caches. It can
+    flip the order for a max heap and break ties by the bytes of the path, which
+    makes equal keys come out in the same order every time. Priority objects can
+    be pickled (as long as their key is a module level function) so they can be
+    sent to worker processes.
+    """
+
+    def __init__(self, key="length", tie_break=False, max_heap=False):
+        """
+        Creates a new Priority.
+
+        Args:
+            key (str or function): Optional, a name from KEYS or a function that
+                                   takes the path bytes and returns a number
+            tie_break (bool): Optional, order paths with equal keys by their bytes
+            max_heap (bool): Optional, put the biggest key at the top instead
+        """
+        self.key = KEYS[key] if isinstance(key, str) else key
+        self.tie_break = tie_break
+        self.max_heap = max_heap
+
+    def __call__(self, line):
+        """
+        Works out the priority of a path.
+
+        Args:
+            line (bytes): The single spaced path
+
+        Return:
+            The number (or (number, line) tuple when breaking ties) to cache
+        """
+        value = self.key(line)
+        if self.max_heap:
+            value = -value
+        if self.tie_break:
+            return (value, line)
+        return value
+
+    def is_default(self):
+        """
+        Checks if this priority is the same as the one PathNode works out itself.
+
+        Return:
+            True if the priority is the plain path length, False otherwise
+        """
+        return self.key is length and not self.tie_break and not self.max_heap
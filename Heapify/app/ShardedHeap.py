@@ -0,0 +1,171 @@
+"""
+This file contains a heap built from many shard files at once. The shards can
+be read in a process pool, where each worker maps and parses one shard and sends
+its paths back as one bytes object, so only one object per shard is pickled. The
+paths are put back together in shard order. Heapifying the joined paths gives
+exactly the heap a single go over the shards concatenated into one file would
+give.
+
+Building and heapifying the nodes stays in the main process, so the pool only
+pays off when parsing is most of the work and there are spare cores. The shards
+are read one after another unless more workers are asked for.
+
+For the paths in order instead of a heap, merge_shards has every worker sort
+its own shard (the n log n part) and k-way merges the sorted shards in the main
+process. The merge is stable, so equal paths come out in the order of the
+concatenated shards, the same as sorting the whole input at once.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import heapq
+
+from ArrayHeap import ArrayHeap
+import PathReader
+import Priority
+
+def pack_paths(paths):
+    """
+    Joins paths into the one bytes object a worker sends back.
+
+    Args:
+        paths (list): The single spaced paths
+
+    Return:
+        bytes: Every path followed by a new line, a path can't contain one
+    """
+    return b"\n".join(paths) + b"\n" if paths else b""
+
+def unpack_paths(data):
+    """
+    Splits what pack_paths joined back into the paths.
+
+    Args:
+        data (bytes): The joined paths
+
+    Return:
+        list: The paths
+    """
+    return data.split(b"\n")[:-1]
+
+def parse_shard(input_file):
+    """
+    Reads and parses a shard in a worker process.
+
+    Args:
+        input_file (str): The shard to read
+
+    Return:
+        bytes: The single spaced paths of the shard, see pack_paths
+
+    raise:
+        ValueError if the shard contains a node with an empty path
+    """
+    return pack_paths(PathReader.read_paths(input_file))
+
+def sort_shard(input_file, priority=None):
+    """
+    Reads a shard and sorts its paths in a worker process, equal paths keep
+    their order in the shard.
+
+    Args:
+        input_file (str): The shard to read
+        priority (Priority): Optional, what to order the paths by, path length if None
+
+    Return:
+        bytes: The sorted paths of the shard, see pack_paths
+
+    raise:
+        ValueError if the shard contains a node with an empty path
+    """
+    paths = PathReader.read_paths(input_file)
+    paths.sort(key=priority or Priority.length)
+    return pack_paths(paths)
+
+def merge_shards(input_files, priority=None, workers=None):
+    """
+    Sorts every shard in its own worker process and k-way merges the sorted
+    shards into one order, the order a single sort of the concatenated shards
+    would give.
+
+    Args:
+        input_files (list): The shard files, in the order they would be concatenated
+        priority (Priority): Optional, what to order the paths by, path length if None
+        workers (int): Optional, the number of processes to sort the shards with, one
+                       per core if None, the shards are sorted one after another if 1
+
+    Return:
+        iterator: The paths of every shard, in order
+
+    raise:
+        ValueError if a shard contains a node with an empty path
+    """
+    sort = partial(sort_shard, priority=priority)
+    if len(input_files) < 2 or workers == 1:
+        shards = map(sort, input_files)
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            shards = list(pool.map(sort, input_files))
+    # heapq.merge takes the earlier shard on ties, so equal paths stay in input order
+    return heapq.merge(*map(unpack_paths, shards), key=priority or Priority.length)
+
+class ShardedHeap(ArrayHeap):
+    """
+    ShardedHeap class is an ArrayHeap whose input is a list of shard files that
+    are read concurrently instead of a single file.
+    """
+
+    def __init__(self, input_files, label, debug=False, echo=True, workers=1, stats=None,
+                 priority=None, arity=2, trie=False):
+        """
+        Creates a sharded heap object for the shard files.
+
+        args:
+            input_files (list): the shard files, in the order they would be concatenated
+            label (str): the label to give to the .dot files
+            debug (bool): Optional, check the result with is_heap after heapifying
+            echo (bool): Optional, also print the .dot files to stdout
+            workers (int): Optional, the number of processes to read the shards with,
+                           one per core if None, the shards are read one after
+                           another if 1
+            stats (Stats): Optional, record phase times and operation counts in stats
+            priority (Priority): Optional, what to order the paths by, path length if None
+            arity (int): Optional, the number of children each node can have
+            trie (bool): Optional, intern the paths in a prefix trie as they are read
+        """
+        super().__init__(list(input_files), label, debug, echo, workers, stats, priority,
+                         arity, trie)
+
+    def read_paths(self, input_file):
+        """
+        Reads all of the shards into temp_path in shard order, one shard per worker
+        process when there are workers.
+
+        args:
+            input_file (list): The shard files to read from
+
+        raise:
+            ValueError if a shard contains a node with an empty path
+        """
+        if len(input_file) < 2 or self.workers == 1:
+            for shard in input_file:
+                self.add_paths(PathReader.iter_paths(shard))
+        else:
+            for paths in self.map_shards(parse_shard, input_file):
+                self.add_paths(unpack_paths(paths))
+        if self.trie is not None:
+            self.trie.compact()
+
+    def map_shards(self, function, input_files):
+        """
+        Runs function on every shard in a process pool.
+
+        args:
+            function (function): The function to run on each shard file
+            input_files (list): The shard files
+
+        returns:
+            list: The results in shard order
+        """
+        with ProcessPoolExecutor(self.workers) as pool:
+            return list(pool.map(function, input_files))
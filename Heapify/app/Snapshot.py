@@ -0,0 +1,340 @@
+"""
+This file contains the binary snapshot format for heapified trees. A snapshot
+holds the nodes in level order (the order of ArrayHeap.nodes) laid out so the
+file can be memory mapped and used as it is:
+
+    header      magic b"HEAPSNAP", version, flags (and the arity of the heap
+                above bit 8, 0 for binary), node count, data size and meta size
+    meta        the name of the key the heap was ordered by, then the path,
+                size and modification time of every input file, all separated
+                by NUL bytes
+    priorities  one int64 per node, or one float64 if FLOAT_PRIORITIES is set
+    offsets     node count + 1 uint64s, where the path of node i is
+                data[offsets[i]:offsets[i + 1]]
+    data        the single spaced bytes of every path, back to back
+
+Everything is little endian and every section starts on an 8 byte boundary.
+Loading a snapshot only maps the file, nodes are made when they are asked for.
+When the heap was ordered by a Priority other than the path length the saved
+priorities are put back on the nodes, with the path added back as the tie
+break when TIE_BREAK is set. A snapshot is only reused for the same input files
+(same size and modification time) and the same key, tie break and max heap
+setting it was saved with. Keys are told apart by their module and name, so a
+lambda or a function made inside another one never matches a snapshot.
+"""
+
+from array import array
+import mmap
+import os
+import struct
+import sys
+
+from PathNode import PathNode
+
+MAGIC = b"HEAPSNAP"
+VERSION = 4
+HEADER = struct.Struct("<8sIIQQQ")
+
+# header flags
+CUSTOM_PRIORITY = 1
+TIE_BREAK = 2
+FLOAT_PRIORITIES = 4
+MAX_HEAP = 8
+# the flags that say how the nodes are ordered
+ORDER_FLAGS = CUSTOM_PRIORITY | TIE_BREAK | MAX_HEAP
+# the arity is kept in the flags above this bit
+ARITY_SHIFT = 8
+
+def key_name(key):
+    """
+    Gives the name a key is saved under, its module and qualified name.
+
+    Args:
+        key (function): The key of a Priority
+
+    Return:
+        bytes: The name, None for a key that can't be found again by its name
+               (a lambda or a function made inside another one)
+    """
+    module = getattr(key, "__module__", None)
+    name = getattr(key, "__qualname__", None)
+    if not module or not name or "<" in name:
+        return None
+    return (module + "." + name).encode()
+
+def ordering(priority=None, arity=2):
+    """
+    Gives the header flags and key name that say how a heap is ordered.
+
+    Args:
+        priority (Priority): Optional, the priority the heap is ordered by
+        arity (int): Optional, the number of children each node of the heap can have
+
+    Return:
+        tuple: The flags and the key name (bytes, None if the key has no name)
+    """
+    flags = 0 if arity == 2 else arity << ARITY_SHIFT
+    if priority is None or priority.is_default():
+        return flags, b"length"
+    flags |= CUSTOM_PRIORITY
+    if priority.tie_break:
+        flags |= TIE_BREAK
+    if priority.max_heap:
+        flags |= MAX_HEAP
+    return flags, key_name(priority.key)
+
+def sources(input_files):
+    """
+    Gives what a snapshot records about its input files.
+
+    Args:
+        input_files (str or list): The file or files the heap was read from, None
+                                   if it wasn't read from a file
+
+    Return:
+        list: The (absolute path, size, modification time in ns) of every file
+
+    raise:
+        OSError if one of the files can't be found
+    """
+    if input_files is None:
+        return []
+    if isinstance(input_files, str):
+        input_files = [input_files]
+    found = []
+    for input_file in input_files:
+        stat = os.stat(input_file)
+        found.append((os.fsencode(os.path.abspath(input_file)), stat.st_size, stat.st_mtime_ns))
+    return found
+
+def pack_meta(key, files):
+    """
+    Lays out the meta section.
+
+    Args:
+        key (bytes): The key name, None if the key has no name
+        files (list): The input files, see sources
+
+    Return:
+        bytes: The section, padded to 8 bytes
+    """
+    fields = [key or b""]
+    for path, size, mtime in files:
+        fields += [path, str(size).encode(), str(mtime).encode()]
+    meta = b"\0".join(fields)
+    return meta + b"\0" * (-len(meta) % 8)
+
+def unpack_meta(meta):
+    """
+    Reads the meta section back.
+
+    Args:
+        meta (bytes): The section, padding included
+
+    Return:
+        tuple: The key name (bytes) and the input files, see sources
+    """
+    fields = bytes(meta).rstrip(b"\0").split(b"\0")
+    files = [(fields[index], int(fields[index + 1]), int(fields[index + 2]))
+             for index in range(1, len(fields) - 2, 3)]
+    return fields[0], files
+
+def save(file_name, nodes, priority=None, arity=2, input_files=None):
+    """
+    Writes the nodes to a snapshot file. The file is written next to file_name
+    and moved into place at the end, so a reader never sees half a snapshot.
+
+    Args:
+        file_name (str): The snapshot file to write
+        nodes (iterable): The PathNodes in level order
+        priority (Priority): Optional, the priority the nodes were ordered by
+        arity (int): Optional, the number of children each node of the heap can have
+        input_files (str or list): Optional, the file or files the nodes were read from
+
+    raise:
+        OSError if one of the input files can't be found
+    """
+    flags, key = ordering(priority, arity)
+    meta = pack_meta(key, sources(input_files))
+
+    values = []
+    offsets = array("Q", [0])
+    lines = []
+    for node in nodes:
+        # a tie broken priority is (key, line), only the key is saved
+        values.append(node.priority[0] if flags & TIE_BREAK else node.priority)
+        offsets.append(offsets[-1] + len(node.line))
+        lines.append(node.line)
+
+    if all(isinstance(value, int) for value in values):
+        priorities = array("q", values)
+    else:
+        flags |= FLOAT_PRIORITIES
+        priorities = array("d", values)
+
+    # the arrays are written in the machine's byte order
+    if sys.byteorder != "little":
+        priorities.byteswap()
+        offsets.byteswap()
+
+    temp_name = file_name + ".tmp"
+    with open(temp_name, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, flags, len(priorities), offsets[-1], len(meta)))
+        file.write(meta)
+        priorities.tofile(file)
+        offsets.tofile(file)
+        file.writelines(lines)
+    os.replace(temp_name, file_name)
+
+def is_fresh(file_name, input_files, priority=None, arity=2):
+    """
+    Checks if there is a snapshot at file_name that was saved from input_files,
+    unchanged since, and ordered by priority with arity children per node.
+
+    Args:
+        file_name (str): The snapshot file
+        input_files (str or list): The file or files the heap would be read from
+        priority (Priority): Optional, the priority the heap has to be ordered by
+        arity (int): Optional, the number of children per node the heap has to have
+
+    Return:
+        True if the snapshot can be used instead of input_files, False otherwise
+    """
+    try:
+        wanted = sources(input_files)
+        with open(file_name, "rb") as file:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return False
+            magic, version, flags, count, size, meta_size = HEADER.unpack(header)
+            if magic != MAGIC or version != VERSION:
+                return False
+            key, files = unpack_meta(file.read(meta_size))
+    except OSError:
+        return False
+    return (files == wanted and ordered_by(flags, key, priority)
+            and (flags >> ARITY_SHIFT or 2) == arity)
+
+def ordered_by(flags, key, priority=None):
+    """
+    Checks if the header of a snapshot says it was ordered by priority.
+
+    Args:
+        flags (int): The flags of the header
+        key (bytes): The key name of the meta section
+        priority (Priority): Optional, the priority to check for, path length if None
+
+    Return:
+        True if the snapshot was ordered the same way, False otherwise
+    """
+    wanted_flags, wanted_key = ordering(priority)
+    return (wanted_key is not None and key == wanted_key
+            and flags & ORDER_FLAGS == wanted_flags & ORDER_FLAGS)
+
+class SnapshotNodes():
+    """
+    SnapshotNodes class is a read only, 1 based sequence over a mapped snapshot
+    that can stand in for ArrayHeap.nodes. Index 0 is None like in the nodes list,
+    and every other index makes a PathNode from the mapped path bytes.
+    """
+
+    def __init__(self, file_name):
+        """
+        Maps the snapshot file and checks its header.
+
+        Args:
+            file_name (str): The snapshot file to map
+
+        raise:
+            ValueError if the file is not a snapshot this version can read
+        """
+        with open(file_name, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.flags, self.count, size, meta_size = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            self.map.close()
+            raise ValueError("\nError! " + file_name + " is not a heap snapshot.\n")
+        start = HEADER.size
+        self.key, self.files = unpack_meta(self.map[start:start + meta_size])
+        self.arity = self.flags >> ARITY_SHIFT or 2
+
+        self.view = view = memoryview(self.map)
+        start += meta_size
+        kind = "d" if self.flags & FLOAT_PRIORITIES else "q"
+        self.priorities = view[start:start + 8 * self.count].cast(kind)
+        start += 8 * self.count
+        self.offsets = view[start:start + 8 * (self.count + 1)].cast("Q")
+        self.data_start = start + 8 * (self.count + 1)
+
+        # the cast views are in the machine's byte order, copy them on big endian
+        if sys.byteorder != "little":
+            self.priorities = array(kind, self.priorities)
+            self.priorities.byteswap()
+            self.offsets = array("Q", self.offsets)
+            self.offsets.byteswap()
+
+    def __len__(self):
+        """
+        Gives the length of the sequence, the number of nodes plus the unused 0
+
+        Return:
+            int: The node count + 1
+        """
+        return self.count + 1
+
+    def __getitem__(self, index):
+        """
+        Makes the PathNode at index (1 based)
+
+        Args:
+            index (int): The position of the node in the heap
+
+        Return:
+            PathNode: The node, None for index 0
+        """
+        if index == 0:
+            return None
+        if index < 0 or index > self.count:
+            raise IndexError("snapshot index out of range")
+        start = self.data_start + self.offsets[index - 1]
+        end = self.data_start + self.offsets[index]
+        node = PathNode(self.map[start:end])
+        if self.flags & CUSTOM_PRIORITY:
+            node.priority = self.priority(index)
+        return node
+
+    def __iter__(self):
+        """
+        Makes every item of the sequence in order, None first.
+
+        Yields:
+            PathNode: The next node
+        """
+        for index in range(self.count + 1):
+            yield self[index]
+
+    def priority(self, index):
+        """
+        Reads the priority of the node at index without making the node.
+
+        Args:
+            index (int): The position of the node in the heap (1 based)
+
+        Return:
+            The priority of the node
+        """
+        value = self.priorities[index - 1]
+        if self.flags & TIE_BREAK:
+            start = self.data_start + self.offsets[index - 1]
+            return (value, self.map[start:self.data_start + self.offsets[index]])
+        return value
+
+    def close(self):
+        """
+        Releases the views and unmaps the file.
+        """
+        # the map can only close once nothing is looking at it
+        for view in (self.priorities, self.offsets, self.view):
+            if isinstance(view, memoryview):
+                view.release()
+        self.map.close()
@@ -0,0 +1,108 @@
+"""
+This file contains the opt in instrumentation for Heap. A Stats object given to
+a Heap records the wall time of every phase of go, counts comparisons, swaps,
+heapify passes and relinked nodes, can run cProfile over go and can call an
+external tracer at the start and end of every phase. Everything is written as
+JSON next to the .dot files. A Heap without a Stats object skips all of it.
+"""
+
+from contextlib import contextmanager
+import cProfile
+import json
+import time
+
+from PathNode import CountingPathNode
+
+class Stats():
+    """
+    Stats class holds the phase times and operation counts of a Heap.
+    """
+
+    def __init__(self, profile=False, tracer=None):
+        """
+        Creates a new Stats object with no phases timed and every count at 0.
+
+        Args:
+            profile (bool): Optional, run cProfile over go and save it as <label>Stats.prof
+            tracer (function): Optional, called as tracer(phase, "start", None) when a
+                               phase starts and tracer(phase, "end", seconds) when it ends
+        """
+        self.phases = {}
+        self.counters = {"swaps": 0, "heapify_passes": 0, "nodes_relinked": 0}
+        self.profile = cProfile.Profile() if profile else None
+        self.tracer = tracer
+        # comparisons are counted by CountingPathNode for every heap at once
+        self.comparison_base = CountingPathNode.comparisons
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Times the code run inside the with block as the phase name, the times of
+        a phase run more than once are added up.
+
+        Args:
+            name (str): The name of the phase
+        """
+        if self.tracer:
+            self.tracer(name, "start", None)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self.phases[name] = self.phases.get(name, 0) + seconds
+            if self.tracer:
+                self.tracer(name, "end", seconds)
+
+    def count(self, name, amount=1):
+        """
+        Adds to one of the operation counts.
+
+        Args:
+            name (str): The count to add to
+            amount (int): Optional, how much to add
+        """
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def start_profile(self):
+        """
+        Starts cProfile if profiling was asked for.
+        """
+        if self.profile:
+            self.profile.enable()
+
+    def stop_profile(self):
+        """
+        Stops cProfile if profiling was asked for.
+        """
+        if self.profile:
+            self.profile.disable()
+
+    def to_dict(self):
+        """
+        Gives the phase times and counts as a dict.
+
+        Return:
+            dict: The phases in seconds, their total and the operation counts
+        """
+        counters = dict(self.counters)
+        counters["comparisons"] = CountingPathNode.comparisons - self.comparison_base
+        return {
+            "phases": dict(self.phases),
+            "total_seconds": sum(self.phases.values()),
+            "counters": counters,
+        }
+
+    def write(self, label):
+        """
+        Writes the stats to <label>Stats.json, and the profile to <label>Stats.prof
+        if there is one.
+
+        Args:
+            label (str): The label of the .dot files
+        """
+        with open(label + "Stats.json", "w") as file:
+            json.dump(self.to_dict(), file, indent=2)
+            file.write("\n")
+        if self.profile:
+            self.profile.dump_stats(label + "Stats.prof")
@@ -0,0 +1,222 @@
+"""
+This file stress tests ConcurrentHeap with many threads and measures its
+throughput. Producer threads push unique paths while consumer threads pop them
+and a checker thread keeps checking the heap with is_heap. At the end every
+pushed path has to have been popped exactly once, every batch popped at once
+has to come out shortest first, and every is_heap check has to have passed.
+
+Each run is done twice, once with a single push or pop per hold of the lock
+(a plain global lock) and once with push_many and pop_many batches, and the
+operations per second of both are reported as JSON.
+
+usage: python3 Stress.py [--producers N] [--consumers N] [--paths N]
+                         [--batch N] [--arity D] [--output FILE]
+"""
+
+from ConcurrentHeap import ConcurrentHeap
+import argparse
+import json
+import platform
+import random
+import threading
+import time
+
+def make_paths(producers, count, seed=1):
+    """
+    Makes the unique paths each producer will push, the producer and path number
+    are the first hops so no two paths are the same.
+
+    Args:
+        producers (int): The number of producers
+        count (int): The number of paths each producer pushes
+        seed (int): Optional, the seed for the path lengths
+
+    Return:
+        list: One list of single spaced paths per producer
+    """
+    rng = random.Random(seed)
+    return [[b" ".join([b"0", str(producer).encode(), str(number).encode()]
+                       + [b"1"] * rng.randint(0, 20)) for number in range(count)]
+            for producer in range(producers)]
+
+def produce(heap, paths, batch):
+    """
+    Pushes the paths, batch at a time or one by one.
+
+    Args:
+        heap (ConcurrentHeap): The heap to push to
+        paths (list): The paths to push
+        batch (int): The number of paths to push at once, 1 for plain pushes
+    """
+    if batch > 1:
+        for start in range(0, len(paths), batch):
+            heap.push_many(paths[start:start + batch])
+    else:
+        for path in paths:
+            heap.push(path)
+
+def consume(heap, batch, done, popped, errors):
+    """
+    Pops until the producers are done and the heap is empty.
+
+    Args:
+        heap (ConcurrentHeap): The heap to pop from
+        batch (int): The number of paths to pop at once, 1 for plain pops
+        done (threading.Event): Set once every producer has finished
+        popped (list): Where to put the list of paths this consumer popped
+        errors (list): Where to put anything that went wrong
+    """
+    taken = []
+    while True:
+        if batch > 1:
+            nodes = heap.pop_many(batch, timeout=0.01)
+        else:
+            try:
+                nodes = [heap.pop()]
+            except IndexError:
+                nodes = []
+
+        if nodes:
+            # a batch is popped under one hold of the lock so it has to be in order
+            if any(nodes[index + 1] < nodes[index] for index in range(len(nodes) - 1)):
+                errors.append("a batch came out of order")
+            taken.extend(node.line for node in nodes)
+        elif done.is_set() and not len(heap):
+            break
+        elif batch == 1:
+            # let the producers in instead of spinning on the lock
+            time.sleep(0.0001)
+    popped.append(taken)
+
+def check(heap, done, errors):
+    """
+    Checks the heap with is_heap over and over until the consumers are done.
+
+    Args:
+        heap (ConcurrentHeap): The heap to check
+        done (threading.Event): Set once every consumer has finished
+        errors (list): Where to put anything that went wrong
+    """
+    while not done.is_set():
+        if not heap.check():
+            errors.append("is_heap failed")
+        time.sleep(0.1)
+
+def stress(producers, consumers, count, batch, arity=2, seed=1):
+    """
+    Runs one stress test and measures it.
+
+    Args:
+        producers (int): The number of producer threads
+        consumers (int): The number of consumer threads
+        count (int): The number of paths each producer pushes
+        batch (int): The number of paths pushed or popped at once, 1 for plain
+                     pushes and pops under a global lock
+        arity (int): Optional, the number of children per node
+        seed (int): Optional, the seed for the path lengths
+
+    Return:
+        dict: The run, its throughput and what went wrong, if anything
+    """
+    work = make_paths(producers, count, seed)
+    heap = ConcurrentHeap(None, "stress", echo=False, arity=arity)
+    produced, finished = threading.Event(), threading.Event()
+    popped, errors = [], []
+
+    pushers = [threading.Thread(target=produce, args=(heap, paths, batch)) for paths in work]
+    poppers = [threading.Thread(target=consume, args=(heap, batch, produced, popped, errors))
+               for _ in range(consumers)]
+    checker = threading.Thread(target=check, args=(heap, finished, errors))
+
+    start = time.perf_counter()
+    for thread in pushers + poppers + [checker]:
+        thread.start()
+    for thread in pushers:
+        thread.join()
+    produced.set()
+    for thread in poppers:
+        thread.join()
+    seconds = time.perf_counter() - start
+    finished.set()
+    checker.join()
+
+    pushed = [path for paths in work for path in paths]
+    taken = [path for paths in popped for path in paths]
+    unique = set(taken)
+    operations = len(pushed) + len(taken)
+    return {
+        "mode": "batched" if batch > 1 else "global_lock",
+        "batch": batch,
+        "producers": producers,
+        "consumers": consumers,
+        "arity": arity,
+        "paths": len(pushed),
+        "seconds": seconds,
+        "ops_per_second": operations / seconds if seconds else None,
+        "lost": len(set(pushed) - unique),
+        "duplicated": len(taken) - len(unique),
+        "heap_ok": heap.check() and not len(heap),
+        "errors": sorted(set(errors)),
+    }
+
+def passed(result):
+    """
+    Checks if a stress run found nothing wrong.
+
+    Args:
+        result (dict): A result from stress
+
+    Return:
+        True if no path was lost or duplicated and the heap was always a heap
+    """
+    return (not result["lost"] and not result["duplicated"] and result["heap_ok"]
+            and not result["errors"])
+
+def parse_args(argv=None):
+    """
+    Reads the command line arguments.
+
+    Args:
+        argv (list): Optional, the arguments to read, sys.argv[1:] if None
+
+    Return:
+        argparse.Namespace: The parsed arguments
+    """
+    parser = argparse.ArgumentParser(prog="python3 Stress.py")
+    parser.add_argument("--producers", type=int, default=8, help="number of pushing threads")
+    parser.add_argument("--consumers", type=int, default=8, help="number of popping threads")
+    parser.add_argument("--paths", type=int, default=20000,
+                        help="number of paths each producer pushes")
+    parser.add_argument("--batch", type=int, default=256,
+                        help="paths pushed or popped at once in the batched run")
+    parser.add_argument("--arity", type=int, default=2, help="children per node")
+    parser.add_argument("--output", metavar="FILE",
+                        help="write the JSON report to FILE instead of stdout")
+    return parser.parse_args(argv)
+
+def main():
+    """
+    Runs the stress test with a global lock and with batches and writes the JSON
+    report, exits with 1 if either run found something wrong.
+    """
+    args = parse_args()
+    results = [stress(args.producers, args.consumers, args.paths, batch, args.arity)
+               for batch in (1, args.batch)]
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+        "passed": all(map(passed, results)),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    if not report["passed"]:
+        raise SystemExit(1)
+
+# call main function
+if __name__ == '__main__':
+    main()
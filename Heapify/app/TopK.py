@@ -0,0 +1,113 @@
+"""
+This file finds the k shortest paths of a listing in a single pass without
+loading the listing. The paths are read lazily with PathReader.iter_paths and
+the k best so far are kept in a max heap of size k, so memory is O(k) no matter
+how long the listing is. Paths are ordered the same way PathNodes are, and paths
+that tie keep the order they had in the listing.
+"""
+
+from PathNode import PathNode
+import PathReader
+
+def worse(entry, other):
+    """
+    Checks if an entry should be dropped before another one, a longer path is
+    worse and between equal paths the later one is worse.
+
+    Args:
+        entry (tuple): The (PathNode, line number) to check
+        other (tuple): The (PathNode, line number) to check against
+
+    Return:
+        True if entry is worse than other, False otherwise
+    """
+    return other[0] < entry[0] or (not entry[0] < other[0] and entry[1] > other[1])
+
+def top_k(paths, k, priority=None):
+    """
+    Finds the k shortest paths.
+
+    Args:
+        paths (iterable): The paths, anything PathNode takes
+        k (int): The number of paths to keep
+        priority (Priority): Optional, what to order the paths by, path length if None
+
+    Return:
+        list: The PathNodes of the k shortest paths, shortest first
+    """
+    # the worst of the paths kept so far is at index 0
+    heap = []
+    if k <= 0:
+        return heap
+
+    for number, path in enumerate(paths):
+        node = PathNode(path)
+        if priority:
+            node.priority = priority(node.line)
+        if len(heap) < k:
+            heap.append((node, number))
+            sift_up(heap, len(heap) - 1)
+        # only a path shorter than the worst one kept can get in
+        elif node < heap[0][0]:
+            heap[0] = (node, number)
+            sift_down(heap, 0)
+
+    # sort by line number first so equal paths stay in listing order
+    heap.sort(key=lambda entry: entry[1])
+    heap.sort(key=lambda entry: entry[0])
+    return [node for node, number in heap]
+
+def top_k_file(input_file, k, priority=None):
+    """
+    Finds the k shortest paths in a file, reading it lazily.
+
+    Args:
+        input_file (str): The file to read from
+        k (int): The number of paths to keep
+        priority (Priority): Optional, what to order the paths by, path length if None
+
+    Return:
+        list: The PathNodes of the k shortest paths, shortest first
+
+    raise:
+        ValueError if an input contains a node with an empty path
+    """
+    return top_k(PathReader.iter_paths(input_file), k, priority)
+
+def sift_up(heap, position):
+    """
+    Moves the entry at position up the max heap until its parent is worse.
+
+    Args:
+        heap (list): The 0 based max heap of entries
+        position (int): The index of the entry to move
+    """
+    entry = heap[position]
+    while position > 0:
+        parent = (position - 1) // 2
+        if not worse(entry, heap[parent]):
+            break
+        heap[position] = heap[parent]
+        position = parent
+    heap[position] = entry
+
+def sift_down(heap, position):
+    """
+    Moves the entry at position down the max heap until neither child is worse.
+
+    Args:
+        heap (list): The 0 based max heap of entries
+        position (int): The index of the entry to move
+    """
+    entry = heap[position]
+    size = len(heap)
+    child = 2 * position + 1
+    while child < size:
+        if child + 1 < size and worse(heap[child + 1], heap[child]):
+            child += 1
+        if not worse(heap[child], entry):
+            break
+        heap[position] = heap[child]
+        position = child
+        child = 2 * position + 1
+    heap[position] = entry